@@ -1,18 +1,29 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import (
-    Column, Integer, String, DateTime, ForeignKey, JSON, Enum, UniqueConstraint, Float, Text
+    Column, Integer, String, DateTime, ForeignKey, JSON, Enum, UniqueConstraint, Float, Text,
+    select, insert, update, delete
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from db_base import Base
 from google import genai
 from google.genai import types
-from tavily import TavilyClient
+import copy
 import json
+import logging
 import re
 import enum
-from typing import List, Dict, Any, Optional
-from config import TAVILY_API_KEY
+import time
+import httpx
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from typing import List, Dict, Any, Iterable, Optional, Set
+from config import (
+    SEARCH_MAX_WORKERS, SEARCH_TIMEOUT_SECONDS, ANALYSIS_PIPELINED, ANALYSIS_STREAMING,
+    ANALYSIS_DEADLINE_SECONDS, ANALYSIS_MIN_CALL_SECONDS, ANALYSIS_MAX_TOOL_ROUNDS, ANALYSIS_MAX_SEARCHES, ANALYSIS_MAX_TOKENS,
+    ANALYSIS_TRIAGE, TRIAGE_FAST_RISK_LEVELS, TRIAGE_FAST_MAX_CLAIMS, TRIAGE_FAST_MAX_SEARCHES,
+    ARTICLE_CHUNK_WORKERS, ARTICLE_CHUNK_CHARS, LITE_BATCH_MAX_CHARS
+)
+import threading
 from models.post_model import (
     Post,
     AnalysisStatus,
@@ -21,9 +32,21 @@ from models.post_model import (
     TrustSignal,
     Claim,
     ClaimSource,
+    ClaimFingerprint,
     FactCheckSite,
+    AnalysisStats,
 )
 from schemas import UserOut, PostOut
+from search_cache import search_cache
+from providers import provider_pool
+from claim_cache import claim_verdict_cache, claim_fingerprint, index_claims
+from progress import progress_registry
+from json_stream import IncrementalJSONParser
+from chunking import split_article, is_long_article, dedupe_claims
+from similarity import index_keywords
+from embeddings import embed_analysis, store_embedding
+
+logger = logging.getLogger("factline.agent")
 
 class NewsArticle:
     def __init__(self, title: str, body: str, **extra):
@@ -36,12 +59,82 @@ class NewsArticle:
         d.update(self.extra)
         return d
 
+def _tavily_search(query: str, max_results: int) -> List[Dict[str, Any]]:
+    with provider_pool.limit("tavily"):
+        res = provider_pool.tavily().search(query=query, max_results=max_results)
+    return res.get("results", [])
+
 def web_search_func(query: str, max_results: int = 5) -> List[Dict[str, Any]]:
     if not query:
         return []
-    tavily = TavilyClient(api_key=TAVILY_API_KEY)
-    res = tavily.search(query=query, max_results=max_results)
-    return res.get("results", [])
+    return search_cache.get_or_search(query, max_results, _tavily_search)
+
+def write_related_rows(
+    db: Session,
+    post_id: int,
+    analysis_data: Dict[str, Any],
+    reused_claims: Iterable[str] = (),
+) -> List[int]:
+    claim_ids = select(Claim.id).where(Claim.post_id == post_id).scalar_subquery()
+    no_sync = {"synchronize_session": False}
+    db.execute(delete(ClaimSource).where(ClaimSource.claim_id.in_(claim_ids)), execution_options=no_sync)
+    db.execute(delete(FactCheckSite).where(FactCheckSite.claim_id.in_(claim_ids)), execution_options=no_sync)
+    db.execute(delete(ClaimFingerprint).where(ClaimFingerprint.claim_id.in_(claim_ids)), execution_options=no_sync)
+    for model in (Claim, PostTag, RedFlag, TrustSignal):
+        db.execute(delete(model).where(model.post_id == post_id), execution_options=no_sync)
+
+    tags = [{"post_id": post_id, "tag": tag.lower()} for tag in analysis_data.get("tags", []) if tag]
+    if tags:
+        db.execute(insert(PostTag), tags)
+
+    red_flags = [{"post_id": post_id, "flag": flag} for flag in analysis_data.get("red_flags", []) if flag]
+    if red_flags:
+        db.execute(insert(RedFlag), red_flags)
+
+    trust_signals = [{"post_id": post_id, "signal": signal} for signal in analysis_data.get("trust_signals", []) if signal]
+    if trust_signals:
+        db.execute(insert(TrustSignal), trust_signals)
+
+    claims = [c for c in analysis_data.get("claims", []) if c.get("text")]
+    if not claims:
+        return []
+
+    new_claim_ids = db.scalars(
+        insert(Claim).returning(Claim.id, sort_by_parameter_order=True),
+        [
+            {
+                "post_id": post_id,
+                "text": claim_data.get("text"),
+                "credibility_score": claim_data.get("credibility_score"),
+                "confidence": claim_data.get("confidence"),
+                "reason": claim_data.get("reason"),
+                "historical_context": claim_data.get("historical_context"),
+            }
+            for claim_data in claims
+        ],
+    ).all()
+
+    sources = [
+        {"claim_id": claim_id, "source_url": url}
+        for claim_id, claim_data in zip(new_claim_ids, claims)
+        for url in claim_data.get("sources", []) if url
+    ]
+    if sources:
+        db.execute(insert(ClaimSource), sources)
+
+    fact_check_sites = [
+        {"claim_id": claim_id, "site_url": url}
+        for claim_id, claim_data in zip(new_claim_ids, claims)
+        for url in claim_data.get("fact_check_sites", []) if url
+    ]
+    if fact_check_sites:
+        db.execute(insert(FactCheckSite), fact_check_sites)
+
+    index_claims(db, new_claim_ids, [claim_data.get("text") for claim_data in claims], reused_claims)
+    return list(new_claim_ids)
+
+_tool_pool = ThreadPoolExecutor(max_workers=SEARCH_MAX_WORKERS, thread_name_prefix="web-search")
+_chunk_pool = ThreadPoolExecutor(max_workers=ARTICLE_CHUNK_WORKERS, thread_name_prefix="article-chunk")
 
 WEB_SEARCH_DECLARATION = types.FunctionDeclaration(
     name="web_search",
@@ -56,6 +149,556 @@ WEB_SEARCH_DECLARATION = types.FunctionDeclaration(
     },
 )
 
+TRIAGE_INSTRUCTIONS = (
+    "'risk_level' is the misinformation risk: 'low' for routine items such as weather, sports results or "
+    "announcements, 'high' for contested political, health, financial or breaking claims, else 'medium'. "
+    "'claim_count' is the number of distinct checkable factual claims."
+)
+
+LITE_SYSTEM_PROMPT = (
+    "You simplify news for lay readers. Return strict JSON with keys: "
+    "{'short_title': str, 'summary_easy': str, 'tags': [str], 'risk_level': 'low'|'medium'|'high', 'claim_count': int}."
+    "Short title 5-8 words, neutral. Summary 4-6 simple sentences. Tags 2-5 topical words. "
+    + TRIAGE_INSTRUCTIONS
+)
+
+DEEP_SYSTEM_PROMPT = (
+    "You are a rigorous misinformation analyst. Extract atomic claims and assess them. "
+    "You should call web_search to fact-check. Return STRICT JSON only with keys: "
+    "{'credibility_score': int, 'bias': str, 'sentiment': str, 'risk_type': str, 'red_flags': [str], "
+    "'claims': [{'text': str, 'credibility_score': int, 'confidence': 'Low'|'Medium'|'High', 'reason': str, 'sources': [str], 'fact_check_sites':[str], 'historical_context': str}], "
+    "'trust_signals': [str], 'alternative_headlines': {'neutral': str, 'sensational': str, 'calm': str}, "
+    "'latitude': float, 'longitude': float}."
+)
+
+CHUNK_SYSTEM_PROMPT = (
+    "You read one section of a long news article. Return strict JSON with keys: "
+    "{'summary': str, 'claims': [str]}. Summary: 2-3 neutral sentences covering the section. "
+    "Claims: every distinct checkable factual claim in the section, each as one self-contained sentence "
+    "that names who or what it is about."
+)
+
+CHUNK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        "claims": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["summary", "claims"],
+}
+
+CHUNK_FALLBACK = {"summary": "", "claims": []}
+
+LONG_FORM_PROMPT = (
+    "This is a long article. Its 'body' holds summaries of each section and 'extracted_claims' the "
+    "deduplicated claims found in the full text. Assess those claims; the output schema is unchanged."
+)
+
+FINAL_ANSWER_PROMPT = (
+    "The research budget for this article is used up. Do not call any more tools. "
+    "Return the final STRICT JSON now, based on the evidence gathered so far; "
+    "lower the confidence of claims you could not verify."
+)
+
+VERIFIED_CLAIMS_PROMPT = (
+    "The input includes 'verified_claims': claims from this article that were fact-checked recently, "
+    "with their verdicts and sources. Reuse those verdicts and sources in your output instead of "
+    "calling web_search for them; only search for claims that are not listed."
+)
+
+LITE_BATCH_SYSTEM_PROMPT = (
+    "You simplify news for lay readers. You receive a JSON list of articles, each with an 'id'. "
+    "Return one entry per article with the same 'id' and keys 'short_title', 'summary_easy', 'tags', "
+    "'risk_level' and 'claim_count'. "
+    "Short title 5-8 words, neutral. Summary 4-6 simple sentences. Tags 2-5 topical words. "
+    + TRIAGE_INSTRUCTIONS
+)
+
+LITE_BATCH_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "id": {"type": "integer"},
+            "short_title": {"type": "string"},
+            "summary_easy": {"type": "string"},
+            "tags": {"type": "array", "items": {"type": "string"}},
+            "risk_level": {"type": "string", "enum": ["low", "medium", "high"]},
+            "claim_count": {"type": "integer"},
+        },
+        "required": ["id", "short_title", "summary_easy", "tags", "risk_level", "claim_count"],
+    },
+}
+
+LITE_FALLBACK = {"short_title": "", "summary_easy": "", "tags": [], "risk_level": "", "claim_count": None}
+
+DEEP_FALLBACK = {
+    "credibility_score": 0,
+    "bias": "",
+    "sentiment": "",
+    "risk_type": "",
+    "red_flags": [],
+    "claims": [],
+    "trust_signals": [],
+    "alternative_headlines": {"neutral": "", "sensational": "", "calm": ""},
+    "latitude": None,
+    "longitude": None,
+}
+
+def parse_json(text: str, fallback: Dict[str, Any]) -> Dict[str, Any]:
+    if not text:
+        return copy.deepcopy(fallback)
+    cleaned = text.strip()
+    if cleaned.startswith("```"):
+        cleaned = re.sub(
+            r"^```(?:json)?\s*|\s*```$", "", cleaned,
+            flags=re.IGNORECASE | re.DOTALL
+        ).strip()
+    try:
+        return json.loads(cleaned)
+    except json.JSONDecodeError:
+        try:
+            m = re.search(r"\{.*\}", cleaned, flags=re.DOTALL)
+            if m:
+                return json.loads(m.group(0))
+        except json.JSONDecodeError:
+            pass
+    return copy.deepcopy(fallback)
+
+def lite_contents(article: NewsArticle) -> types.Content:
+    usr = json.dumps(article.to_dict(), ensure_ascii=False)
+    return types.Content(
+        role="user",
+        parts=[
+            types.Part.from_text(text=LITE_SYSTEM_PROMPT),
+            types.Part.from_text(text=usr)
+        ]
+    )
+
+def lite_batch_groups(articles: Dict[int, NewsArticle], max_chars: int = LITE_BATCH_MAX_CHARS) -> List[Dict[int, NewsArticle]]:
+    groups, current, size = [], {}, 0
+    for post_id, article in articles.items():
+        length = len(article.title or "") + len(article.body or "")
+        if current and size + length > max_chars:
+            groups.append(current)
+            current, size = {}, 0
+        current[post_id] = article
+        size += length
+    if current:
+        groups.append(current)
+    return groups
+
+def lite_batch_contents(articles: Dict[int, NewsArticle]) -> types.Content:
+    usr = json.dumps(
+        [{"id": post_id, **article.to_dict()} for post_id, article in articles.items()],
+        ensure_ascii=False,
+    )
+    return types.Content(
+        role="user",
+        parts=[
+            types.Part.from_text(text=LITE_BATCH_SYSTEM_PROMPT),
+            types.Part.from_text(text=usr)
+        ]
+    )
+
+def lite_batch_config() -> types.GenerateContentConfig:
+    return types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_schema=LITE_BATCH_SCHEMA,
+    )
+
+def parse_lite_batch(text: str, post_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    try:
+        entries = json.loads(text or "")
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(entries, list):
+        return {}
+
+    wanted = set(post_ids)
+    results = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        post_id = entry.get("id")
+        if post_id in wanted and post_id not in results:
+            results[post_id] = {key: entry.get(key, default) for key, default in LITE_FALLBACK.items()}
+    return results
+
+def batch_lite_transform(
+    client: genai.Client,
+    articles: Dict[int, NewsArticle],
+    model: str = "gemini-2.5-flash-lite",
+) -> Dict[int, Dict[str, Any]]:
+    results = {}
+    for group in lite_batch_groups(articles):
+        with provider_pool.limit("gemini"):
+            response = client.models.generate_content(
+                model=model,
+                contents=lite_batch_contents(group),
+                config=lite_batch_config(),
+            )
+        results.update(parse_lite_batch(response.text, list(group)))
+    return results
+
+def deep_contents(
+    article: NewsArticle,
+    lite: Optional[Dict[str, Any]],
+    verified_claims: Optional[List[Dict[str, Any]]] = None,
+) -> List[types.Content]:
+    payload = {"article": article.to_dict()}
+    if lite is not None:
+        payload["lite"] = lite
+    parts = [types.Part.from_text(text=DEEP_SYSTEM_PROMPT)]
+    if "extracted_claims" in article.extra:
+        parts.append(types.Part.from_text(text=LONG_FORM_PROMPT))
+    if verified_claims:
+        payload["verified_claims"] = verified_claims
+        parts.append(types.Part.from_text(text=VERIFIED_CLAIMS_PROMPT))
+    usr = json.dumps(payload, ensure_ascii=False)
+    parts.append(types.Part.from_text(text=usr))
+    return [types.Content(role="user", parts=parts)]
+
+def chunk_contents(article: NewsArticle, index: int, total: int, chunk: str) -> types.Content:
+    usr = json.dumps({"title": article.title, "section": f"{index + 1} of {total}", "text": chunk}, ensure_ascii=False)
+    return types.Content(
+        role="user",
+        parts=[
+            types.Part.from_text(text=CHUNK_SYSTEM_PROMPT),
+            types.Part.from_text(text=usr)
+        ]
+    )
+
+def chunk_config() -> types.GenerateContentConfig:
+    return types.GenerateContentConfig(response_mime_type="application/json", response_schema=CHUNK_SCHEMA)
+
+def condensed_article(article: NewsArticle, sections: List[Dict[str, Any]]) -> NewsArticle:
+    claims = dedupe_claims([claim for section in sections for claim in section.get("claims") or []])
+    summaries = [section.get("summary") or "" for section in sections]
+    return NewsArticle(
+        title=article.title,
+        body="\n\n".join(s for s in summaries if s) or article.body[:ARTICLE_CHUNK_CHARS],
+        **{**article.extra, "extracted_claims": claims, "sections": len(sections)},
+    )
+
+def claim_lookup_text(article: NewsArticle) -> str:
+    return "\n".join([article.body, *article.extra.get("extracted_claims", [])])
+
+def claim_fingerprints(texts: Iterable[str]) -> Set[str]:
+    return {fp for fp in map(claim_fingerprint, texts) if fp}
+
+def cached_verdict_result(verdicts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "results": [{"url": url} for verdict in verdicts for url in verdict["sources"]],
+        "verified_claims": verdicts,
+    }
+
+def deep_config() -> types.GenerateContentConfig:
+    tools = types.Tool(function_declarations=[WEB_SEARCH_DECLARATION])
+    return types.GenerateContentConfig(tools=[tools])
+
+def final_config() -> types.GenerateContentConfig:
+    tools = types.Tool(function_declarations=[WEB_SEARCH_DECLARATION])
+    return types.GenerateContentConfig(
+        tools=[tools],
+        tool_config=types.ToolConfig(
+            function_calling_config=types.FunctionCallingConfig(mode=types.FunctionCallingConfigMode.NONE)
+        ),
+    )
+
+def final_answer_prompt() -> List[types.Content]:
+    return [types.Content(role="user", parts=[types.Part.from_text(text=FINAL_ANSWER_PROMPT)])]
+
+def final_answer_turn(tool_calls: List[types.FunctionCall], reason: str) -> List[types.Content]:
+    results = [{"results": [], "error": f"Research budget exhausted ({reason})"} for _ in tool_calls]
+    return tool_turn(tool_calls, results) + final_answer_prompt()
+
+def with_timeout(config: types.GenerateContentConfig, seconds: float) -> types.GenerateContentConfig:
+    return config.model_copy(update={"http_options": types.HttpOptions(timeout=int(seconds * 1000))})
+
+class ModelCallTimeout(Exception):
+    pass
+
+class AnalysisCancelled(Exception):
+    pass
+
+def is_timeout(error: BaseException) -> bool:
+    return isinstance(error, (httpx.TimeoutException, TimeoutError))
+
+def search_arguments(call: types.FunctionCall):
+    arguments = call.args or {}
+    q = arguments.get("query", "").strip()
+    k = min(max(int(arguments.get("max_results", 5)), 1), 10)
+    return q, k
+
+def tool_turn(tool_calls: List[types.FunctionCall], tool_results: List[Dict[str, Any]]) -> List[types.Content]:
+    return [
+        types.Content(
+            role="model",
+            parts=[types.Part.from_function_call(name=call.name, args=call.args) for call in tool_calls]
+        ),
+        types.Content(
+            role="tool",
+            parts=[
+                types.Part.from_function_response(name=call.name, response=result)
+                for call, result in zip(tool_calls, tool_results)
+            ]
+        ),
+    ]
+
+class AnalysisBudget:
+    def __init__(
+        self,
+        deadline_seconds: float = ANALYSIS_DEADLINE_SECONDS,
+        max_tool_rounds: int = ANALYSIS_MAX_TOOL_ROUNDS,
+        max_searches: int = ANALYSIS_MAX_SEARCHES,
+        max_tokens: int = ANALYSIS_MAX_TOKENS,
+    ):
+        self.deadline_seconds = deadline_seconds
+        self.max_tool_rounds = max_tool_rounds
+        self.max_searches = max_searches
+        self.max_tokens = max_tokens
+        self.started = time.monotonic()
+        self.model_calls = 0
+        self.tool_rounds = 0
+        self.searches = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.total_tokens = 0
+        self.exhausted_reason: Optional[str] = None
+        self.cancelled = False
+        self._lock = threading.Lock()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> float:
+        return self.deadline_seconds - self.elapsed()
+
+    def record_turn(self, turn: "StreamedTurn"):
+        usage = turn.usage
+        with self._lock:
+            self.model_calls += 1
+            if usage:
+                prompt = usage.prompt_token_count or 0
+                output = (usage.candidates_token_count or 0) + (usage.thoughts_token_count or 0)
+                self.prompt_tokens += prompt
+                self.output_tokens += output
+                self.total_tokens += usage.total_token_count or prompt + output
+
+    def admit(self, tool_calls: List[types.FunctionCall]) -> List[bool]:
+        admitted = []
+        with self._lock:
+            self.tool_rounds += 1
+            for call in tool_calls:
+                allowed = call.name != "web_search" or self.searches < self.max_searches
+                if allowed and call.name == "web_search":
+                    self.searches += 1
+                admitted.append(allowed)
+        return admitted
+
+    def exhausted(self) -> Optional[str]:
+        with self._lock:
+            if self.remaining() <= 0:
+                reason = "deadline"
+            elif self.tool_rounds >= self.max_tool_rounds:
+                reason = "tool_rounds"
+            elif self.searches >= self.max_searches:
+                reason = "searches"
+            elif self.total_tokens >= self.max_tokens:
+                reason = "tokens"
+            else:
+                return None
+            self.exhausted_reason = self.exhausted_reason or reason
+            return reason
+
+    def tool_timeout(self) -> float:
+        return max(1.0, min(SEARCH_TIMEOUT_SECONDS, self.remaining()))
+
+    def call_timeout(self) -> float:
+        return max(ANALYSIS_MIN_CALL_SECONDS, self.remaining())
+
+    def restrict(self, max_searches: int, max_tool_rounds: int):
+        with self._lock:
+            self.max_searches = min(self.max_searches, max_searches)
+            self.max_tool_rounds = min(self.max_tool_rounds, max_tool_rounds)
+
+    def stop(self, reason: str):
+        with self._lock:
+            self.exhausted_reason = self.exhausted_reason or reason
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            self.exhausted_reason = self.exhausted_reason or "cancelled"
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "elapsed_seconds": round(self.elapsed(), 3),
+                "model_calls": self.model_calls,
+                "tool_rounds": self.tool_rounds,
+                "searches": self.searches,
+                "prompt_tokens": self.prompt_tokens,
+                "output_tokens": self.output_tokens,
+                "total_tokens": self.total_tokens,
+                "budget_exhausted": self.exhausted_reason,
+            }
+
+def admitted_results(admitted: List[bool], results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    results = iter(results)
+    return [next(results) if ok else {"results": [], "error": "Search budget exhausted"} for ok in admitted]
+
+def triage(lite: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    lite = lite or {}
+    risk_level = str(lite.get("risk_level") or "").lower() or None
+    claim_count = lite.get("claim_count")
+    if not isinstance(claim_count, int) or isinstance(claim_count, bool):
+        claim_count = None
+
+    decision = {"route": "full", "risk_level": risk_level, "claim_count": claim_count}
+    if not ANALYSIS_TRIAGE:
+        decision["route_reason"] = "triage disabled"
+    elif not lite:
+        decision["route_reason"] = "no summary available"
+    elif risk_level not in TRIAGE_FAST_RISK_LEVELS:
+        decision["route_reason"] = f"risk level {risk_level or 'unknown'}"
+    elif claim_count is None:
+        decision["route_reason"] = "claim count unknown"
+    elif claim_count > TRIAGE_FAST_MAX_CLAIMS:
+        decision["route_reason"] = f"{claim_count} claims over fast path limit of {TRIAGE_FAST_MAX_CLAIMS}"
+    else:
+        decision["route"] = "fast"
+        decision["route_reason"] = f"risk level {risk_level}, {claim_count} claims"
+    return decision
+
+def route_config(decision: Dict[str, Any], budget: AnalysisBudget) -> types.GenerateContentConfig:
+    if decision["route"] != "fast":
+        return deep_config()
+    budget.restrict(TRIAGE_FAST_MAX_SEARCHES, 1)
+    return deep_config() if TRIAGE_FAST_MAX_SEARCHES > 0 else final_config()
+
+class StreamedTurn:
+    def __init__(self):
+        self.parser = IncrementalJSONParser()
+        self.text_parts: List[str] = []
+        self.tool_calls: List[types.FunctionCall] = []
+        self.usage = None
+        self.truncated = False
+
+    @property
+    def text(self) -> str:
+        return "".join(self.text_parts)
+
+    def add(self, chunk: types.GenerateContentResponse):
+        events = []
+        if chunk.usage_metadata:
+            self.usage = chunk.usage_metadata
+        if not chunk.candidates or not chunk.candidates[0].content:
+            return events
+        for part in chunk.candidates[0].content.parts or []:
+            if part.function_call:
+                self.tool_calls.append(part.function_call)
+            elif part.text and not part.thought:
+                self.text_parts.append(part.text)
+                events.extend(self.parser.feed(part.text))
+        return events
+
+    def result(self, fallback: Dict[str, Any]) -> Dict[str, Any]:
+        parsed = parse_json(self.text, None)
+        if parsed is not None:
+            return parsed
+        return {**copy.deepcopy(fallback), **self.parser.partial()}
+
+def store_lite(db: Session, post_id: int, lite: Dict[str, Any]) -> bool:
+    post = db.query(Post).get(post_id)
+    if not post:
+        return False
+
+    post.short_title = lite.get("short_title")
+    post.summary_easy = lite.get("summary_easy")
+
+    db.execute(delete(PostTag).where(PostTag.post_id == post_id), execution_options={"synchronize_session": False})
+    tags = [{"post_id": post_id, "tag": tag.lower()} for tag in lite.get("tags", []) if tag]
+    if tags:
+        db.execute(insert(PostTag), tags)
+    db.expire(post, ["tags"])
+    db.commit()
+    return True
+
+def store_lite_batch(db: Session, lites: Dict[int, Dict[str, Any]]):
+    if not lites:
+        return
+
+    db.execute(update(Post), [
+        {"id": post_id, "short_title": lite.get("short_title"), "summary_easy": lite.get("summary_easy")}
+        for post_id, lite in lites.items()
+    ])
+    db.execute(
+        delete(PostTag).where(PostTag.post_id.in_(list(lites))),
+        execution_options={"synchronize_session": False},
+    )
+    tags = [
+        {"post_id": post_id, "tag": tag.lower()}
+        for post_id, lite in lites.items()
+        for tag in lite.get("tags", []) if tag
+    ]
+    if tags:
+        db.execute(insert(PostTag), tags)
+
+def store_analysis(
+    db: Session,
+    post_id: int,
+    out: Dict[str, Any],
+    message: str = "Analysis complete",
+    stats: Optional[Dict[str, Any]] = None,
+    reused_claims: Iterable[str] = (),
+    embedding=None,
+) -> bool:
+    post = db.query(Post).get(post_id)
+    if not post:
+        return False
+
+    post.analysis_raw = out
+    post.short_title = out.get("short_title")
+    post.summary_easy = out.get("summary_easy")
+    post.credibility_score = out.get("credibility_score")
+    post.bias = out.get("bias")
+    post.sentiment = out.get("sentiment")
+    post.risk_type = out.get("risk_type")
+
+    alt_headlines = out.get("alternative_headlines") or {}
+    post.alt_headline_neutral = alt_headlines.get("neutral")
+    post.alt_headline_sensational = alt_headlines.get("sensational")
+    post.alt_headline_calm = alt_headlines.get("calm")
+
+    if "latitude" in out:
+        post.latitude = out.get("latitude")
+    if "longitude" in out:
+        post.longitude = out.get("longitude")
+
+    write_related_rows(db, post.id, out, reused_claims)
+    index_keywords(db, post.id, post.title)
+    store_embedding(db, post.id, embedding)
+    db.expire(post, ["tags", "red_flags", "trust_signals", "claims"])
+
+    if stats is not None:
+        db.merge(AnalysisStats(post_id=post.id, **stats))
+
+    post.analysis_status = AnalysisStatus.COMPLETED
+    post.analysis_progress = 100
+    post.status_message = message
+    db.commit()
+    return True
+
+def completed_state(post_id: int, message: str) -> Dict[str, Any]:
+    return {
+        "post_id": post_id,
+        "analysis_status": AnalysisStatus.COMPLETED,
+        "analysis_progress": 100,
+        "status_message": message,
+    }
+
 class NewsCredibilityEngine:
     def __init__(
         self,
@@ -65,218 +708,242 @@ class NewsCredibilityEngine:
         cheap_model: str = "gemini-2.5-flash-lite",
         strong_model: str = "gemini-2.5-flash",
     ):
-        self.tavily = TavilyClient(api_key=tavily_key)
-        self.client = genai.Client()
+        self.tavily = provider_pool.tavily()
+        self.client = provider_pool.gemini()
         self.cheap_model_name = cheap_model
         self.strong_model_name = strong_model
         self.db = db
         self.post_id = post_id
+        self.budget = AnalysisBudget()
+        self.reused_claims: Set[str] = set()
 
     def _update_progress(self, progress: float, message: str, status: AnalysisStatus = None):
-        post = self.db.query(Post).get(self.post_id)
-        if not post:
+        if self.budget.cancelled:
             return
-        post.analysis_progress = progress
-        post.status_message = message
-        if status:
-            post.analysis_status = status
-        self.db.commit()
+        progress_registry.update(self.post_id, progress, message, status)
 
-    def analyze(self, article: NewsArticle) -> Dict[str, Any]:
+    def analyze(self, article: NewsArticle, lite: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         if not article.body.strip():
             self._update_progress(0, "Empty article body", AnalysisStatus.FAILED)
+            progress_registry.finish(self.post_id)
             return {"error": "Empty article body"}
 
+        self.budget = AnalysisBudget()
+        self.reused_claims = set()
         self._update_progress(5, "Init", AnalysisStatus.PROCESSING)
-        lite = self._lite_transform(article)
-
-        self._update_progress(40, "Lite analysis complete")
-        deep = self._deep_analysis(article, lite)
+        if is_long_article(article.body):
+            article = self._condense(article)
+
+        if lite is not None:
+            self._update_progress(40, "Summary ready, deep analysis in progress")
+            decision = triage(lite)
+            deep = self._deep_analysis(article, lite, decision)
+        elif ANALYSIS_PIPELINED and not ANALYSIS_TRIAGE:
+            lite, decision, deep = self._analyze_pipelined(article)
+        else:
+            lite = self._lite_transform(article)
+            store_lite(self.db, self.post_id, lite)
+
+            self._update_progress(40, "Lite analysis complete")
+            decision = triage(lite)
+            deep = self._deep_analysis(article, lite, decision)
 
         self._update_progress(95, "Merging data")
         out = {**lite, **deep}
-
-        post = self.db.query(Post).get(self.post_id)
-        if post:
-            post.analysis_raw = out
-            post.short_title = out.get("short_title")
-            post.summary_easy = out.get("summary_easy")
-            post.credibility_score = out.get("credibility_score")
-            post.bias = out.get("bias")
-            post.sentiment = out.get("sentiment")
-            post.risk_type = out.get("risk_type")
-
-            alt_headlines = out.get("alternative_headlines", {})
-            post.alt_headline_neutral = alt_headlines.get("neutral")
-            post.alt_headline_sensational = alt_headlines.get("sensational")
-            post.alt_headline_calm = alt_headlines.get("calm")
-
-            if "latitude" in out:
-                post.latitude = out.get("latitude")
-            if "longitude" in out:
-                post.longitude = out.get("longitude")
-
-            self._update_related_tables(post, out)
-
-            post.analysis_status = AnalysisStatus.COMPLETED
-            post.analysis_progress = 100
-            post.status_message = "Analysis complete"
-            self.db.commit()
+        self._store_result(out, stats={**self.budget.stats(), **decision})
 
         return out
 
-    def _update_related_tables(self, post: Post, analysis_data: Dict[str, Any]):
-        post.tags.clear()
-        post.red_flags.clear()
-        post.trust_signals.clear()
-        post.claims.clear()
-
-        for tag in analysis_data.get("tags", []):
-            post.tags.append(PostTag(tag=tag.lower()))
-
-        for flag in analysis_data.get("red_flags", []):
-            post.red_flags.append(RedFlag(flag=flag))
-
-        for signal in analysis_data.get("trust_signals", []):
-            post.trust_signals.append(TrustSignal(signal=signal))
-
-        for claim_data in analysis_data.get("claims", []):
-            new_claim = Claim(
-                text=claim_data.get("text"),
-                credibility_score=claim_data.get("credibility_score"),
-                confidence=claim_data.get("confidence"),
-                reason=claim_data.get("reason"),
-                historical_context=claim_data.get("historical_context")
-            )
-
-            for source_url in claim_data.get("sources", []):
-                new_claim.sources.append(ClaimSource(source_url=source_url))
+    def _analyze_pipelined(self, article: NewsArticle):
+        stage = ThreadPoolExecutor(max_workers=1, thread_name_prefix="deep-analysis")
+        try:
+            deep_future = stage.submit(self._deep_analysis, article, None)
+            try:
+                lite = self._lite_transform(article)
+                store_lite(self.db, self.post_id, lite)
+            except BaseException:
+                self.budget.cancel()
+                deep_future.cancel()
+                raise
+            self._update_progress(40, "Summary ready, deep analysis in progress")
+            return lite, triage(lite), deep_future.result()
+        finally:
+            stage.shutdown(wait=False)
+
+    def _condense(self, article: NewsArticle) -> NewsArticle:
+        chunks = split_article(article.body)
+        self._update_progress(6, f"Long article: extracting claims from {len(chunks)} sections")
+        futures = [
+            _chunk_pool.submit(self._extract_chunk, article, i, len(chunks), chunk)
+            for i, chunk in enumerate(chunks)
+        ]
+        condensed = condensed_article(article, [future.result() for future in futures])
+        self._update_progress(9, f"Extracted {len(condensed.extra['extracted_claims'])} claims from {len(chunks)} sections")
+        return condensed
 
-            for site_url in claim_data.get("fact_check_sites", []):
-                new_claim.fact_check_sites.append(FactCheckSite(site_url=site_url))
+    def _extract_chunk(self, article: NewsArticle, index: int, total: int, chunk: str) -> Dict[str, Any]:
+        try:
+            with provider_pool.limit("gemini"):
+                response = self.client.models.generate_content(
+                    model=self.cheap_model_name,
+                    contents=chunk_contents(article, index, total, chunk),
+                    config=with_timeout(chunk_config(), self.budget.call_timeout()),
+                )
+        except Exception:
+            logger.warning("Claim extraction failed for section %d of post %s", index + 1, self.post_id, exc_info=True)
+            return copy.deepcopy(CHUNK_FALLBACK)
+        turn = StreamedTurn()
+        turn.add(response)
+        self.budget.record_turn(turn)
+        return turn.result(CHUNK_FALLBACK)
+
+    def reuse_analysis(self, source: Post, similarity: float) -> Dict[str, Any]:
+        self._update_progress(50, f"Reusing analysis from post {source.id}", AnalysisStatus.PROCESSING)
+        out = copy.deepcopy(source.analysis_raw or {})
+        self.reused_claims = claim_fingerprints(claim.get("text") for claim in out.get("claims", []))
+        self._store_result(out, f"Analysis reused from post {source.id} ({similarity:.0%} match)")
+        return out
 
-            post.claims.append(new_claim)
+    def _store_result(self, out: Dict[str, Any], message: str = "Analysis complete", stats: Optional[Dict[str, Any]] = None):
+        embedding = embed_analysis(out)
+        if store_analysis(self.db, self.post_id, out, message, stats, self.reused_claims, embedding):
+            progress_registry.finish(self.post_id, completed_state(self.post_id, message))
+
+    def _generate(self, model: str, contents, config: types.GenerateContentConfig) -> StreamedTurn:
+        if self.budget.cancelled:
+            raise AnalysisCancelled(f"Analysis of post {self.post_id} was cancelled")
+        with provider_pool.limit("gemini"):
+            timeout = self.budget.call_timeout()
+            turn = self._generate_turn(model, contents, with_timeout(config, timeout), time.monotonic() + timeout)
+        self.budget.record_turn(turn)
+        return turn
+
+    def _generate_turn(self, model: str, contents, config: types.GenerateContentConfig, deadline: float) -> StreamedTurn:
+        turn = StreamedTurn()
+        if not ANALYSIS_STREAMING:
+            try:
+                response = self.client.models.generate_content(model=model, contents=contents, config=config)
+            except Exception as e:
+                if is_timeout(e):
+                    raise ModelCallTimeout(str(e)) from e
+                raise
+            if turn.add(response):
+                progress_registry.update_partial(self.post_id, turn.parser.partial())
+            return turn
 
-        self.db.commit()
+        try:
+            for chunk in self.client.models.generate_content_stream(model=model, contents=contents, config=config):
+                if turn.add(chunk):
+                    progress_registry.update_partial(self.post_id, turn.parser.partial())
+                if time.monotonic() > deadline:
+                    raise TimeoutError("Model stream passed the analysis deadline")
+        except Exception as e:
+            if not turn.text_parts:
+                if is_timeout(e):
+                    raise ModelCallTimeout(str(e)) from e
+                raise
+            logger.warning("Stream for post %s ended early, keeping partial output", self.post_id, exc_info=True)
+            turn.truncated = True
+        return turn
+
+    def _deep_turn(self, model: str, contents_list: List[types.Content], config: types.GenerateContentConfig, final: bool = False) -> StreamedTurn:
+        try:
+            return self._generate(model, contents_list, config)
+        except ModelCallTimeout:
+            self.budget.stop("deadline")
+            if final:
+                logger.warning("Final answer for post %s timed out, using fallback result", self.post_id)
+                return StreamedTurn()
+        self._update_progress(75, "Research budget reached (deadline), finalizing")
+        return self._deep_turn(model, contents_list + final_answer_prompt(), final_config(), final=True)
 
     def _lite_transform(self, article: NewsArticle) -> Dict[str, Any]:
         self._update_progress(10, "Lite transform started")
-        sys = (
-            "You simplify news for lay readers. Return strict JSON with keys: "
-            "{'short_title': str, 'summary_easy': str, 'tags': [str]}."
-            "Short title 5-8 words, neutral. Summary 4-6 simple sentences. Tags 2-5 topical words."
-        )
-        usr = json.dumps(article.to_dict(), ensure_ascii=False)
-
-        response = self.client.models.generate_content(
-            model=self.cheap_model_name,
-            contents=types.Content(
-                role="user",
-                parts=[
-                    types.Part.from_text(text=sys),
-                    types.Part.from_text(text=usr)
-                ]
-            ),
-            config=types.GenerateContentConfig(response_mime_type="application/json")
-        )
+
+        try:
+            turn = self._generate(
+                self.cheap_model_name,
+                lite_contents(article),
+                types.GenerateContentConfig(response_mime_type="application/json"),
+            )
+        except ModelCallTimeout:
+            logger.warning("Lite transform for post %s timed out, using fallback summary", self.post_id)
+            self.budget.stop("deadline")
+            turn = StreamedTurn()
 
         self._update_progress(30, "Lite transform response received")
-        return self._parse_json(
-            response.text, {"short_title": "", "summary_easy": "", "tags": []}
-        )
-
-    def _deep_analysis(self, article: NewsArticle, lite: Dict[str, Any]) -> Dict[str, Any]:
-        self._update_progress(45, "Deep analysis started")
-        sys = (
-            "You are a rigorous misinformation analyst. Extract atomic claims and assess them. "
-            "You should call web_search to fact-check. Return STRICT JSON only with keys: "
-            "{'credibility_score': int, 'bias': str, 'sentiment': str, 'risk_type': str, 'red_flags': [str], "
-            "'claims': [{'text': str, 'credibility_score': int, 'confidence': 'Low'|'Medium'|'High', 'reason': str, 'sources': [str], 'fact_check_sites':[str], 'historical_context': str}], "
-            "'trust_signals': [str], 'alternative_headlines': {'neutral': str, 'sensational': str, 'calm': str}, "
-            "'latitude': float, 'longitude': float}."
-        )
-        usr = json.dumps({"article": article.to_dict(), "lite": lite}, ensure_ascii=False)
-
-        tools = types.Tool(function_declarations=[WEB_SEARCH_DECLARATION])
-        config = types.GenerateContentConfig(tools=[tools])
-
-        contents_list = [
-            types.Content(role="user", parts=[
-                types.Part.from_text(text=sys),
-                types.Part.from_text(text=usr)
-            ])
-        ]
+        return turn.result(LITE_FALLBACK)
 
-        response = self.client.models.generate_content(
-            model=self.strong_model_name,
-            contents=contents_list,
-            config=config,
-        )
+    def _deep_analysis(
+        self,
+        article: NewsArticle,
+        lite: Optional[Dict[str, Any]],
+        decision: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        decision = decision or triage(None)
+        model = self.cheap_model_name if decision["route"] == "fast" else self.strong_model_name
+        config = route_config(decision, self.budget)
+        self._update_progress(45, f"Deep analysis started ({decision['route']} path: {decision['route_reason']})")
+        verified = claim_verdict_cache.for_article(article.title, claim_lookup_text(article))
+        if verified:
+            self.reused_claims |= claim_fingerprints(verdict["claim"] for verdict in verified)
+            self._update_progress(45, f"Reusing {len(verified)} recently verified claims")
+        contents_list = deep_contents(article, lite, verified)
+
+        turn = self._deep_turn(model, contents_list, config)
 
         self._update_progress(55, "Deep analysis first pass")
 
-        while response.candidates and any(p.function_call for p in response.candidates[0].content.parts):
-            tool_calls = [p.function_call for p in response.candidates[0].content.parts if p.function_call]
-            for call in tool_calls:
-                function_name = call.name
-                arguments = call.args
-
-                if function_name == "web_search":
-                    q = arguments.get("query", "").strip()
-                    k = int(arguments.get("max_results", 5))
-                    self._update_progress(60, f"Searching: {q}")
-                    s = web_search_func(query=q, max_results=k)
-
-                    contents_list.append(types.Content(
-                        role="model",
-                        parts=[types.Part.from_function_call(name=function_name, args=arguments)]
-                    ))
-                    contents_list.append(types.Content(
-                        role="tool",
-                        parts=[types.Part.from_function_response(name=function_name, response={"results": s})]
-                    ))
-
-            response = self.client.models.generate_content(
-                model=self.strong_model_name,
-                contents=contents_list,
-                config=config,
-            )
+        while turn.tool_calls and not turn.truncated:
+            tool_calls = turn.tool_calls
+            reason = self.budget.exhausted()
+            if reason:
+                self._update_progress(75, f"Research budget reached ({reason}), finalizing")
+                contents_list.extend(final_answer_turn(tool_calls, reason))
+                turn = self._deep_turn(model, contents_list, final_config(), final=True)
+                break
+
+            admitted = self.budget.admit(tool_calls)
+            queries = [
+                search_arguments(call)[0]
+                for call, ok in zip(tool_calls, admitted) if ok and call.name == "web_search"
+            ]
+            self._update_progress(60, f"Searching: {'; '.join(queries)}")
+
+            tool_results = self._run_tool_calls([call for call, ok in zip(tool_calls, admitted) if ok])
+            tool_results = admitted_results(admitted, tool_results)
+            contents_list.extend(tool_turn(tool_calls, tool_results))
+
+            turn = self._deep_turn(model, contents_list, config)
             self._update_progress(70, "Deep analysis post-tools")
 
         self._update_progress(85, "Parsing deep analysis result")
-        return self._parse_json(
-            response.text,
-            {
-                "credibility_score": 0,
-                "bias": "",
-                "sentiment": "",
-                "risk_type": "",
-                "red_flags": [],
-                "claims": [],
-                "trust_signals": [],
-                "alternative_headlines": {"neutral": "", "sensational": "", "calm": ""},
-                "latitude": None,
-                "longitude": None,
-            },
-        )
+        return turn.result(DEEP_FALLBACK)
 
+    def _run_tool_calls(self, tool_calls: List[types.FunctionCall]) -> List[Dict[str, Any]]:
+        futures = [_tool_pool.submit(self._execute_tool_call, call) for call in tool_calls]
+        deadline = time.monotonic() + self.budget.tool_timeout()
 
-    def _parse_json(self, text: str, fallback: Dict[str, Any]) -> Dict[str, Any]:
-        if not text:
-            return fallback
-        cleaned = text.strip()
-        if cleaned.startswith("```"):
-            cleaned = re.sub(
-                r"^```(?:json)?\s*|\s*```$", "", cleaned,
-                flags=re.IGNORECASE | re.DOTALL
-            ).strip()
-        try:
-            return json.loads(cleaned)
-        except json.JSONDecodeError:
+        results = []
+        for call, future in zip(tool_calls, futures):
             try:
-                m = re.search(r"\{.*\}", cleaned, flags=re.DOTALL)
-                if m:
-                    return json.loads(m.group(0))
-            except json.JSONDecodeError:
-                pass
-        return fallback
\ No newline at end of file
+                results.append(future.result(timeout=max(0.0, deadline - time.monotonic())))
+            except FuturesTimeoutError:
+                future.cancel()
+                results.append({"results": [], "error": f"{call.name} timed out"})
+            except Exception as e:
+                results.append({"results": [], "error": str(e)})
+        return results
+
+    def _execute_tool_call(self, call: types.FunctionCall) -> Dict[str, Any]:
+        if call.name == "web_search":
+            q, k = search_arguments(call)
+            verdicts = claim_verdict_cache.for_query(q)
+            if verdicts:
+                self.reused_claims |= claim_fingerprints(verdict["claim"] for verdict in verdicts)
+                return cached_verdict_result(verdicts)
+            return {"results": web_search_func(query=q, max_results=k)}
+        return {"results": [], "error": f"Unknown tool: {call.name}"}
+
+    def _parse_json(self, text: str, fallback: Dict[str, Any]) -> Dict[str, Any]:
+        return parse_json(text, fallback)
@@ -0,0 +1,320 @@
+import asyncio
+import copy
+import logging
+from typing import Any, Dict, List, Optional, Set
+from google import genai
+from google.genai import types
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import (
+    SEARCH_MAX_WORKERS, ANALYSIS_PIPELINED, ANALYSIS_STREAMING, ANALYSIS_TRIAGE
+)
+from models.post_model import Post, AnalysisStatus
+from agent import (
+    NewsArticle,
+    AnalysisBudget,
+    StreamedTurn,
+    LITE_FALLBACK,
+    DEEP_FALLBACK,
+    lite_contents,
+    lite_batch_groups,
+    lite_batch_contents,
+    lite_batch_config,
+    parse_lite_batch,
+    deep_contents,
+    chunk_contents,
+    chunk_config,
+    condensed_article,
+    claim_lookup_text,
+    CHUNK_FALLBACK,
+    claim_fingerprints,
+    cached_verdict_result,
+    final_config,
+    triage,
+    route_config,
+    final_answer_turn,
+    final_answer_prompt,
+    ModelCallTimeout,
+    admitted_results,
+    search_arguments,
+    tool_turn,
+    store_lite,
+    store_analysis,
+    completed_state,
+)
+from search_cache import search_cache
+from providers import provider_pool
+from claim_cache import claim_verdict_cache
+from embeddings import aembed_analysis
+from progress import progress_registry
+from chunking import split_article, is_long_article
+
+logger = logging.getLogger("factline.agent")
+
+_search_semaphore: Optional[asyncio.Semaphore] = None
+
+def _search_slots() -> asyncio.Semaphore:
+    global _search_semaphore
+    if _search_semaphore is None:
+        _search_semaphore = asyncio.Semaphore(SEARCH_MAX_WORKERS)
+    return _search_semaphore
+
+async def _tavily_search(query: str, max_results: int) -> List[Dict[str, Any]]:
+    async with provider_pool.alimit("tavily"):
+        res = await provider_pool.async_tavily().search(query=query, max_results=max_results)
+    return res.get("results", [])
+
+async def web_search_async(query: str, max_results: int = 5) -> List[Dict[str, Any]]:
+    if not query:
+        return []
+    async with _search_slots():
+        return await search_cache.aget_or_search(query, max_results, _tavily_search)
+
+async def batch_lite_transform_async(
+    client: genai.Client,
+    articles: Dict[int, NewsArticle],
+    model: str = "gemini-2.5-flash-lite",
+) -> Dict[int, Dict[str, Any]]:
+    async def transform(group: Dict[int, NewsArticle]) -> Dict[int, Dict[str, Any]]:
+        async with provider_pool.alimit("gemini"):
+            response = await client.aio.models.generate_content(
+                model=model,
+                contents=lite_batch_contents(group),
+                config=lite_batch_config(),
+            )
+        return parse_lite_batch(response.text, list(group))
+
+    results = {}
+    for lites in await asyncio.gather(*(transform(group) for group in lite_batch_groups(articles))):
+        results.update(lites)
+    return results
+
+class AsyncNewsCredibilityEngine:
+    def __init__(
+        self,
+        tavily_key: str,
+        db: AsyncSession,
+        post_id: int,
+        cheap_model: str = "gemini-2.5-flash-lite",
+        strong_model: str = "gemini-2.5-flash",
+    ):
+        self.tavily = provider_pool.async_tavily()
+        self.client = provider_pool.async_gemini()
+        self.cheap_model_name = cheap_model
+        self.strong_model_name = strong_model
+        self.db = db
+        self.post_id = post_id
+        self.budget = AnalysisBudget()
+        self.reused_claims: Set[str] = set()
+
+    async def _update_progress(self, progress: float, message: str, status: AnalysisStatus = None):
+        await progress_registry.aupdate(self.post_id, progress, message, status)
+
+    async def analyze(self, article: NewsArticle, lite: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if not article.body.strip():
+            await self._update_progress(0, "Empty article body", AnalysisStatus.FAILED)
+            progress_registry.finish(self.post_id)
+            return {"error": "Empty article body"}
+
+        self.budget = AnalysisBudget()
+        self.reused_claims = set()
+        await self._update_progress(5, "Init", AnalysisStatus.PROCESSING)
+        if is_long_article(article.body):
+            article = await self._condense(article)
+
+        if lite is not None:
+            await self._update_progress(40, "Summary ready, deep analysis in progress")
+            decision = triage(lite)
+            deep = await self._deep_analysis(article, lite, decision)
+        elif ANALYSIS_PIPELINED and not ANALYSIS_TRIAGE:
+            lite, decision, deep = await self._analyze_pipelined(article)
+        else:
+            lite = await self._lite_transform(article)
+            await self.db.run_sync(store_lite, self.post_id, lite)
+
+            await self._update_progress(40, "Lite analysis complete")
+            decision = triage(lite)
+            deep = await self._deep_analysis(article, lite, decision)
+
+        await self._update_progress(95, "Merging data")
+        out = {**lite, **deep}
+        await self._store_result(out, stats={**self.budget.stats(), **decision})
+
+        return out
+
+    async def _analyze_pipelined(self, article: NewsArticle):
+        deep_task = asyncio.create_task(self._deep_analysis(article, None))
+        try:
+            lite = await self._lite_transform(article)
+            await self.db.run_sync(store_lite, self.post_id, lite)
+            await self._update_progress(40, "Summary ready, deep analysis in progress")
+        except BaseException:
+            deep_task.cancel()
+            raise
+        return lite, triage(lite), await deep_task
+
+    async def _condense(self, article: NewsArticle) -> NewsArticle:
+        chunks = split_article(article.body)
+        await self._update_progress(6, f"Long article: extracting claims from {len(chunks)} sections")
+        sections = await asyncio.gather(*(
+            self._extract_chunk(article, i, len(chunks), chunk) for i, chunk in enumerate(chunks)
+        ))
+        condensed = condensed_article(article, sections)
+        await self._update_progress(9, f"Extracted {len(condensed.extra['extracted_claims'])} claims from {len(chunks)} sections")
+        return condensed
+
+    async def _extract_chunk(self, article: NewsArticle, index: int, total: int, chunk: str) -> Dict[str, Any]:
+        try:
+            async with provider_pool.alimit("gemini"):
+                response = await asyncio.wait_for(
+                    self.client.aio.models.generate_content(
+                        model=self.cheap_model_name,
+                        contents=chunk_contents(article, index, total, chunk),
+                        config=chunk_config(),
+                    ),
+                    self.budget.call_timeout(),
+                )
+        except Exception:
+            logger.warning("Claim extraction failed for section %d of post %s", index + 1, self.post_id, exc_info=True)
+            return copy.deepcopy(CHUNK_FALLBACK)
+        turn = StreamedTurn()
+        turn.add(response)
+        self.budget.record_turn(turn)
+        return turn.result(CHUNK_FALLBACK)
+
+    async def reuse_analysis(self, source: Post, similarity: float) -> Dict[str, Any]:
+        await self._update_progress(50, f"Reusing analysis from post {source.id}", AnalysisStatus.PROCESSING)
+        out = copy.deepcopy(source.analysis_raw or {})
+        self.reused_claims = claim_fingerprints(claim.get("text") for claim in out.get("claims", []))
+        await self._store_result(out, f"Analysis reused from post {source.id} ({similarity:.0%} match)")
+        return out
+
+    async def _store_result(self, out: Dict[str, Any], message: str = "Analysis complete", stats: Optional[Dict[str, Any]] = None):
+        embedding = await aembed_analysis(out)
+        if await self.db.run_sync(store_analysis, self.post_id, out, message, stats, self.reused_claims, embedding):
+            progress_registry.finish(self.post_id, completed_state(self.post_id, message))
+
+    async def _generate(self, model: str, contents, config: types.GenerateContentConfig) -> StreamedTurn:
+        turn = StreamedTurn()
+        async with provider_pool.alimit("gemini"):
+            try:
+                await asyncio.wait_for(self._generate_turn(model, contents, config, turn), self.budget.call_timeout())
+            except asyncio.TimeoutError:
+                if not turn.text_parts:
+                    raise ModelCallTimeout(f"{model} call passed the analysis deadline")
+                logger.warning("Stream for post %s passed the analysis deadline, keeping partial output", self.post_id)
+                turn.truncated = True
+        self.budget.record_turn(turn)
+        return turn
+
+    async def _generate_turn(self, model: str, contents, config: types.GenerateContentConfig, turn: StreamedTurn):
+        if not ANALYSIS_STREAMING:
+            response = await self.client.aio.models.generate_content(model=model, contents=contents, config=config)
+            if turn.add(response):
+                progress_registry.update_partial(self.post_id, turn.parser.partial())
+            return
+
+        try:
+            stream = await self.client.aio.models.generate_content_stream(model=model, contents=contents, config=config)
+            async for chunk in stream:
+                if turn.add(chunk):
+                    progress_registry.update_partial(self.post_id, turn.parser.partial())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            if not turn.text_parts:
+                raise
+            logger.warning("Stream for post %s ended early, keeping partial output", self.post_id, exc_info=True)
+            turn.truncated = True
+
+    async def _deep_turn(self, model: str, contents_list: List[types.Content], config: types.GenerateContentConfig, final: bool = False) -> StreamedTurn:
+        try:
+            return await self._generate(model, contents_list, config)
+        except ModelCallTimeout:
+            self.budget.stop("deadline")
+            if final:
+                logger.warning("Final answer for post %s timed out, using fallback result", self.post_id)
+                return StreamedTurn()
+        await self._update_progress(75, "Research budget reached (deadline), finalizing")
+        return await self._deep_turn(model, contents_list + final_answer_prompt(), final_config(), final=True)
+
+    async def _lite_transform(self, article: NewsArticle) -> Dict[str, Any]:
+        await self._update_progress(10, "Lite transform started")
+
+        try:
+            turn = await self._generate(
+                self.cheap_model_name,
+                lite_contents(article),
+                types.GenerateContentConfig(response_mime_type="application/json"),
+            )
+        except ModelCallTimeout:
+            logger.warning("Lite transform for post %s timed out, using fallback summary", self.post_id)
+            self.budget.stop("deadline")
+            turn = StreamedTurn()
+
+        await self._update_progress(30, "Lite transform response received")
+        return turn.result(LITE_FALLBACK)
+
+    async def _deep_analysis(
+        self,
+        article: NewsArticle,
+        lite: Optional[Dict[str, Any]],
+        decision: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        decision = decision or triage(None)
+        model = self.cheap_model_name if decision["route"] == "fast" else self.strong_model_name
+        config = route_config(decision, self.budget)
+        await self._update_progress(45, f"Deep analysis started ({decision['route']} path: {decision['route_reason']})")
+        verified = await asyncio.to_thread(claim_verdict_cache.for_article, article.title, claim_lookup_text(article))
+        if verified:
+            self.reused_claims |= claim_fingerprints(verdict["claim"] for verdict in verified)
+            await self._update_progress(45, f"Reusing {len(verified)} recently verified claims")
+        contents_list = deep_contents(article, lite, verified)
+
+        turn = await self._deep_turn(model, contents_list, config)
+
+        await self._update_progress(55, "Deep analysis first pass")
+
+        while turn.tool_calls and not turn.truncated:
+            tool_calls = turn.tool_calls
+            reason = self.budget.exhausted()
+            if reason:
+                await self._update_progress(75, f"Research budget reached ({reason}), finalizing")
+                contents_list.extend(final_answer_turn(tool_calls, reason))
+                turn = await self._deep_turn(model, contents_list, final_config(), final=True)
+                break
+
+            admitted = self.budget.admit(tool_calls)
+            queries = [
+                search_arguments(call)[0]
+                for call, ok in zip(tool_calls, admitted) if ok and call.name == "web_search"
+            ]
+            await self._update_progress(60, f"Searching: {'; '.join(queries)}")
+
+            tool_results = await self._run_tool_calls([call for call, ok in zip(tool_calls, admitted) if ok])
+            tool_results = admitted_results(admitted, tool_results)
+            contents_list.extend(tool_turn(tool_calls, tool_results))
+
+            turn = await self._deep_turn(model, contents_list, config)
+            await self._update_progress(70, "Deep analysis post-tools")
+
+        await self._update_progress(85, "Parsing deep analysis result")
+        return turn.result(DEEP_FALLBACK)
+
+    async def _run_tool_calls(self, tool_calls: List[types.FunctionCall]) -> List[Dict[str, Any]]:
+        return await asyncio.gather(*(self._execute_tool_call(call) for call in tool_calls))
+
+    async def _execute_tool_call(self, call: types.FunctionCall) -> Dict[str, Any]:
+        if call.name != "web_search":
+            return {"results": [], "error": f"Unknown tool: {call.name}"}
+        q, k = search_arguments(call)
+        try:
+            verdicts = await asyncio.to_thread(claim_verdict_cache.for_query, q)
+            if verdicts:
+                self.reused_claims |= claim_fingerprints(verdict["claim"] for verdict in verdicts)
+                return cached_verdict_result(verdicts)
+            results = await asyncio.wait_for(web_search_async(query=q, max_results=k), self.budget.tool_timeout())
+            return {"results": results}
+        except asyncio.TimeoutError:
+            return {"results": [], "error": f"{call.name} timed out"}
+        except Exception as e:
+            return {"results": [], "error": str(e)}
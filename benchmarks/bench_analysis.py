@@ -0,0 +1,222 @@
+import argparse
+import functools
+import inspect
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+STAGES = ("_condense", "_lite_transform", "_deep_analysis", "_generate", "_run_tool_calls", "_store_result")
+
+class StageTimer:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    def wrap(self, cls, stage: str):
+        original = getattr(cls, stage)
+        if inspect.iscoroutinefunction(original):
+            @functools.wraps(original)
+            async def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await original(*args, **kwargs)
+                finally:
+                    self.record(stage, time.perf_counter() - started)
+        else:
+            @functools.wraps(original)
+            def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    self.record(stage, time.perf_counter() - started)
+        setattr(cls, stage, timed)
+
+class StatementCounter:
+    def __init__(self):
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        verb = statement.lstrip().split(None, 1)[0].upper()
+        with self._lock:
+            self.counts[verb] += 1
+
+    @property
+    def writes(self) -> int:
+        return sum(self.counts[verb] for verb in ("INSERT", "UPDATE", "DELETE"))
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def synthetic_body(index: int, chars: int) -> str:
+    sentence = f"Officials in district {index} said the new policy would affect {index * 37 % 1000} residents this year. "
+    return (sentence * (chars // len(sentence) + 1))[:chars]
+
+def seed_posts(SessionLocal, n_posts: int, body_chars: int, batch: bool):
+    from sqlalchemy import insert
+    from models.user import User
+    from models.post_model import Post
+    import job_queue
+    import config
+
+    db = SessionLocal()
+    try:
+        user = User(email=f"bench-{time.time_ns()}@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        post_ids = db.scalars(
+            insert(Post).returning(Post.id, sort_by_parameter_order=True),
+            [
+                {"title": f"Benchmark headline {i} {time.time_ns()}", "body": synthetic_body(i, body_chars), "created_by": user.id}
+                for i in range(n_posts)
+            ],
+        ).all()
+        if batch:
+            for start in range(0, len(post_ids), config.LITE_BATCH_SIZE):
+                job_queue.enqueue(db, None, kind="lite_batch",
+                                  payload={"post_ids": post_ids[start:start + config.LITE_BATCH_SIZE]}, commit=False)
+        else:
+            for post_id in post_ids:
+                job_queue.enqueue(db, post_id, commit=False)
+        db.commit()
+        return post_ids
+    finally:
+        db.close()
+
+def wait_for_jobs(SessionLocal, timeout: float):
+    from models.job_model import AnalysisJob, JobStatus
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        db = SessionLocal()
+        try:
+            pending = db.query(AnalysisJob).filter(
+                AnalysisJob.status.in_([JobStatus.QUEUED, JobStatus.RUNNING])
+            ).count()
+        finally:
+            db.close()
+        if not pending:
+            return True
+        time.sleep(0.05)
+    return False
+
+def run_analyses(args, timer: StageTimer, statements: StatementCounter):
+    import agent
+    import agent_async
+    from database import SessionLocal
+    from models.post_model import Post, AnalysisStatus, AnalysisStats
+    from worker import AnalysisWorker, AsyncAnalysisWorker
+
+    for cls in (agent.NewsCredibilityEngine, agent_async.AsyncNewsCredibilityEngine):
+        for stage in STAGES:
+            timer.wrap(cls, stage)
+
+    post_ids = seed_posts(SessionLocal, args.posts, args.body_chars, args.batch)
+    statements.counts.clear()
+
+    worker_cls = AsyncAnalysisWorker if args.use_async else AnalysisWorker
+    worker = worker_cls(concurrency=args.concurrency, poll_interval=0.01)
+    started = time.perf_counter()
+    worker.start()
+    finished = wait_for_jobs(SessionLocal, args.timeout)
+    elapsed = time.perf_counter() - started
+    worker.stop(timeout=args.timeout)
+
+    db = SessionLocal()
+    try:
+        statuses = Counter(
+            status.value for (status,) in db.query(Post.analysis_status).filter(Post.id.in_(post_ids))
+        )
+        latencies = [
+            seconds for (seconds,) in db.query(AnalysisStats.elapsed_seconds).filter(AnalysisStats.post_id.in_(post_ids))
+            if seconds is not None
+        ]
+        routes = Counter(route for (route,) in db.query(AnalysisStats.route).filter(AnalysisStats.post_id.in_(post_ids)))
+    finally:
+        db.close()
+
+    if not finished:
+        print(f"  timed out after {args.timeout:.0f}s")
+    completed = statuses.get(AnalysisStatus.COMPLETED.value, 0)
+    print(f"  {completed}/{len(post_ids)} completed in {elapsed:.2f}s  "
+          f"{completed / elapsed:.2f} analyses/s  statuses {dict(statuses)}  routes {dict(routes)}")
+    if latencies:
+        print(f"  analysis latency p50 {percentile(latencies, 50) * 1000:.0f} ms  "
+              f"p95 {percentile(latencies, 95) * 1000:.0f} ms  max {max(latencies) * 1000:.0f} ms")
+    return completed
+
+def run_game(rounds: int, timer: StageTimer):
+    import game_logic
+    for _ in range(rounds):
+        started = time.perf_counter()
+        article = game_logic.fetch_real_article("us")
+        timer.record("fetch_real_article", time.perf_counter() - started)
+        started = time.perf_counter()
+        game_logic.doctor_article_with_gemini(article)
+        timer.record("doctor_article_with_gemini", time.perf_counter() - started)
+
+def report(timer: StageTimer, statements: StatementCounter, completed: int):
+    print("  stage                         calls   total s   mean ms    p95 ms")
+    for stage, samples in timer.samples.items():
+        print(f"  {stage.lstrip('_'):28s} {len(samples):6d} {sum(samples):9.2f} "
+              f"{statistics.mean(samples) * 1000:9.1f} {percentile(samples, 95) * 1000:9.1f}")
+    per_post = f" ({statements.writes / completed:.1f} per analysis)" if completed else ""
+    print(f"  statements {dict(statements.counts)}  writes {statements.writes}{per_post}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analysis pipeline end to end against provider stand-ins")
+    parser.add_argument("--url", default=os.getenv("BENCH_DATABASE_URL"),
+                        help="database URL (default: a fresh SQLite file)")
+    parser.add_argument("--posts", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--async", dest="use_async", action="store_true", help="use the asyncio worker and engine")
+    parser.add_argument("--batch", action="store_true", help="queue lite_batch jobs instead of one analyze job per post")
+    parser.add_argument("--latency-ms", type=float, default=50, help="synthetic latency per provider call")
+    parser.add_argument("--replay", metavar="PATH", help="replay recorded provider responses instead of synthetic ones")
+    parser.add_argument("--body-chars", type=int, default=3000)
+    parser.add_argument("--game", type=int, default=0, help="also time N rounds of the game article generator")
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite:///{tempfile.mkdtemp(prefix='factline-bench-')}/bench.db"
+    os.environ["DATABASE_URL"] = url
+    os.environ["PROVIDER_MODE"] = "replay" if args.replay else "synthetic"
+    if args.replay:
+        os.environ["PROVIDER_RECORDINGS_PATH"] = args.replay
+    os.environ["SYNTHETIC_LATENCY_MS"] = str(args.latency_ms)
+    os.environ.setdefault("GOOGLE_API_KEY", "offline")
+    os.environ.setdefault("TAVILY_API_KEY", "offline")
+    os.environ.setdefault("NEWS_API_KEY", "offline")
+    os.environ.setdefault("DEDUP_ENABLED", "false")
+    os.environ.setdefault("EMBEDDED_ANALYSIS_WORKERS", "0")
+    for limit in ("GEMINI_RATE_PER_SECOND", "TAVILY_RATE_PER_SECOND"):
+        os.environ.setdefault(limit, "0")
+
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    statements = StatementCounter()
+    event.listen(Engine, "before_cursor_execute", statements)
+
+    timer = StageTimer()
+    mode = "async" if args.use_async else "threaded"
+    print(f"{args.posts} posts, {mode} worker x{args.concurrency}, {os.environ['PROVIDER_MODE']} providers "
+          f"({args.latency_ms:.0f} ms) against {url.split('://', 1)[0]}")
+    completed = run_analyses(args, timer, statements)
+    if args.game:
+        run_game(args.game, timer)
+    report(timer, statements, completed)
+
+if __name__ == "__main__":
+    main()
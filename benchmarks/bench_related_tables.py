@@ -0,0 +1,125 @@
+import argparse
+import os
+import sys
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from db_base import Base
+from models.user import User
+from models.post_model import Post, PostTag, RedFlag, TrustSignal, Claim, ClaimSource, FactCheckSite
+import models.token_model
+import models.job_model
+import models.search_cache_model
+from agent import write_related_rows
+
+def synthetic_analysis(n_claims: int = 50) -> dict:
+    return {
+        "tags": [f"tag{i}" for i in range(5)],
+        "red_flags": [f"Red flag {i}" for i in range(5)],
+        "trust_signals": [f"Trust signal {i}" for i in range(5)],
+        "claims": [
+            {
+                "text": f"Synthetic claim number {i} about an event that happened.",
+                "credibility_score": i % 100,
+                "confidence": ("Low", "Medium", "High")[i % 3],
+                "reason": "Corroborated by several independent outlets." * 3,
+                "historical_context": "Similar claims circulated in previous years." * 2,
+                "sources": [f"https://example.com/{i}/source/{j}" for j in range(3)],
+                "fact_check_sites": [f"https://factcheck.example.org/{i}/{j}" for j in range(2)],
+            }
+            for i in range(n_claims)
+        ],
+    }
+
+def orm_path(db, post: Post, analysis_data: dict):
+    post.tags.clear()
+    post.red_flags.clear()
+    post.trust_signals.clear()
+    post.claims.clear()
+
+    for tag in analysis_data.get("tags", []):
+        post.tags.append(PostTag(tag=tag.lower()))
+
+    for flag in analysis_data.get("red_flags", []):
+        post.red_flags.append(RedFlag(flag=flag))
+
+    for signal in analysis_data.get("trust_signals", []):
+        post.trust_signals.append(TrustSignal(signal=signal))
+
+    for claim_data in analysis_data.get("claims", []):
+        new_claim = Claim(
+            text=claim_data.get("text"),
+            credibility_score=claim_data.get("credibility_score"),
+            confidence=claim_data.get("confidence"),
+            reason=claim_data.get("reason"),
+            historical_context=claim_data.get("historical_context")
+        )
+        for source_url in claim_data.get("sources", []):
+            new_claim.sources.append(ClaimSource(source_url=source_url))
+        for site_url in claim_data.get("fact_check_sites", []):
+            new_claim.fact_check_sites.append(FactCheckSite(site_url=site_url))
+        post.claims.append(new_claim)
+
+    db.commit()
+
+def bulk_path(db, post: Post, analysis_data: dict):
+    write_related_rows(db, post.id, analysis_data)
+    db.expire(post, ["tags", "red_flags", "trust_signals", "claims"])
+    db.commit()
+
+def run(url: str, iterations: int, n_claims: int):
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    statements = [0]
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.__setitem__(0, statements[0] + 1))
+
+    db = Session()
+    user = User(email=f"bench-{time.time_ns()}@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+
+    analysis = synthetic_analysis(n_claims)
+    results = {}
+    for name, path in (("orm", orm_path), ("bulk", bulk_path)):
+        post = Post(title="Benchmark post", body="Body", created_by=user.id)
+        db.add(post)
+        db.commit()
+        path(db, post, analysis)
+
+        statements[0] = 0
+        started = time.perf_counter()
+        for _ in range(iterations):
+            post = db.get(Post, post.id)
+            path(db, post, analysis)
+        elapsed = time.perf_counter() - started
+
+        assert len(post.claims) == n_claims
+        assert sum(len(c.sources) for c in post.claims) == n_claims * 3
+        results[name] = (elapsed / iterations * 1000, statements[0] / iterations)
+
+    db.close()
+    engine.dispose()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ORM and bulk writes of analysis child rows")
+    parser.add_argument("--url", default=os.getenv("BENCH_DATABASE_URL", "sqlite://"))
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--claims", type=int, default=50)
+    args = parser.parse_args()
+
+    results = run(args.url, args.iterations, args.claims)
+    print(f"{args.claims} claims, {args.iterations} rewrites against {engine_name(args.url)}")
+    for name, (ms, stmts) in results.items():
+        print(f"  {name:5s} {ms:8.2f} ms/rewrite  {stmts:7.1f} statements/rewrite")
+    print(f"  speedup x{results['orm'][0] / results['bulk'][0]:.1f}")
+
+def engine_name(url: str) -> str:
+    return url.split("://", 1)[0]
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import math
+import re
+from typing import List
+from claim_cache import normalize_claim
+import config
+
+def _units(body: str, max_chars: int) -> List[str]:
+    units = []
+    for paragraph in re.split(r"\n\s*\n", body):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            units.append(paragraph)
+            continue
+        for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+            while len(sentence) > max_chars:
+                units.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            if sentence.strip():
+                units.append(sentence.strip())
+    return units
+
+def split_article(
+    body: str,
+    chunk_chars: int = config.ARTICLE_CHUNK_CHARS,
+    overlap_chars: int = config.ARTICLE_CHUNK_OVERLAP_CHARS,
+    max_chunks: int = config.LONG_ARTICLE_MAX_CHUNKS,
+) -> List[str]:
+    body = (body or "").strip()
+    if not body:
+        return []
+    chunk_chars = max(chunk_chars, math.ceil(len(body) / max(1, max_chunks)))
+
+    chunks = []
+    current: List[str] = []
+    size = 0
+    for unit in _units(body, chunk_chars):
+        if current and size + len(unit) > chunk_chars:
+            chunks.append("\n\n".join(current))
+            tail = current[-1]
+            current, size = ([tail], len(tail)) if len(tail) <= overlap_chars else ([], 0)
+        current.append(unit)
+        size += len(unit) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+def is_long_article(body: str) -> bool:
+    return len(body or "") > config.LONG_ARTICLE_THRESHOLD_CHARS
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def dedupe_claims(claims: List[str], threshold: float = 0.8) -> List[str]:
+    kept: List[str] = []
+    kept_tokens: List[set] = []
+    for claim in claims:
+        if not isinstance(claim, str) or not claim.strip():
+            continue
+        tokens = set(normalize_claim(claim).split())
+        if not tokens:
+            continue
+        duplicate = None
+        for i, existing in enumerate(kept_tokens):
+            if _jaccard(tokens, existing) >= threshold:
+                duplicate = i
+                break
+        if duplicate is None:
+            kept.append(claim.strip())
+            kept_tokens.append(tokens)
+        elif len(claim) > len(kept[duplicate]):
+            kept[duplicate] = claim.strip()
+            kept_tokens[duplicate] = tokens
+    return kept
@@ -0,0 +1,168 @@
+import hashlib
+import re
+import threading
+import unicodedata
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session, selectinload
+from models.post_model import Claim, ClaimFingerprint
+import config
+
+STOPWORDS = frozenset(
+    "a an the and or but of to in on at by for from with as is are was were be been being has have had "
+    "that this these those it its their his her they he she we you i said says say according reported "
+    "reportedly will would could should may might than then there about into over after before".split()
+)
+
+MAX_CANDIDATES = 500
+
+ATTRIBUTION = re.compile(
+    r"^.{0,80}?\b(?:said|says|stated|reported|announced|claimed|claims|confirmed|warned)\b(?:\s+that)?\s+",
+    re.IGNORECASE,
+)
+
+def normalize_claim(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = re.sub(r"(\d),(\d{3})", r"\1\2", text)
+    text = re.sub(r"\s*\bper\s*cent\b", "%", text)
+    tokens = re.findall(r"\d+(?:\.\d+)?%?|\w+", text)
+    return " ".join(t for t in tokens if t not in STOPWORDS)
+
+def claim_fingerprint(text: str) -> Optional[str]:
+    normalized = normalize_claim(text)
+    if not normalized:
+        return None
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def candidate_texts(title: str, body: str) -> List[str]:
+    texts = []
+    for sentence in re.split(r"(?<=[.!?])\s+|[;\n]+", f"{title or ''}\n{body or ''}"):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        texts.append(sentence)
+        unattributed = ATTRIBUTION.sub("", sentence)
+        if unattributed != sentence:
+            texts.append(unattributed)
+        clauses = [c.strip() for c in re.split(r",\s+|\s+-\s+|:\s+", sentence) if c.strip()]
+        if len(clauses) > 1:
+            texts.extend(clauses)
+    return texts
+
+def index_claims(
+    db: Session,
+    claim_ids: List[int],
+    texts: List[str],
+    reused: Iterable[str] = (),
+    max_age_hours: float = config.CLAIM_CACHE_MAX_AGE_HOURS,
+):
+    fingerprints = {claim_id: claim_fingerprint(text) for claim_id, text in zip(claim_ids, texts)}
+    fingerprints = {claim_id: fp for claim_id, fp in fingerprints.items() if fp}
+    if not fingerprints:
+        return
+
+    reused = set(reused) & set(fingerprints.values())
+    verified_at = {}
+    if reused:
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=max_age_hours)
+        verified_at = dict(
+            db.query(ClaimFingerprint.fingerprint, func.max(ClaimFingerprint.verified_at))
+            .filter(ClaimFingerprint.fingerprint.in_(reused), ClaimFingerprint.verified_at >= cutoff)
+            .group_by(ClaimFingerprint.fingerprint)
+            .all()
+        )
+    now = datetime.now(timezone.utc)
+    db.execute(insert(ClaimFingerprint), [
+        {"claim_id": claim_id, "fingerprint": fp, "verified_at": verified_at.get(fp) or now}
+        for claim_id, fp in fingerprints.items()
+    ])
+
+def _verdict(claim: Claim, verified_at: datetime) -> Dict[str, Any]:
+    return {
+        "claim": claim.text,
+        "credibility_score": claim.credibility_score,
+        "confidence": claim.confidence,
+        "reason": claim.reason,
+        "historical_context": claim.historical_context,
+        "sources": [s.source_url for s in claim.sources],
+        "fact_check_sites": [f.site_url for f in claim.fact_check_sites],
+        "verified_at": verified_at.isoformat() if verified_at else None,
+    }
+
+class ClaimVerdictCache:
+    def __init__(
+        self,
+        max_age_hours: float = config.CLAIM_CACHE_MAX_AGE_HOURS,
+        session_factory: Optional[Callable] = None,
+    ):
+        self.max_age_hours = max_age_hours
+        self._session_factory = session_factory
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+
+    def _session(self):
+        if self._session_factory is None:
+            from database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def lookup(self, texts: Iterable[str], limit: int = config.CLAIM_CACHE_MAX_CONTEXT) -> List[Dict[str, Any]]:
+        fingerprints = []
+        for text in texts:
+            fingerprint = claim_fingerprint(text)
+            if fingerprint and fingerprint not in fingerprints:
+                fingerprints.append(fingerprint)
+            if len(fingerprints) >= MAX_CANDIDATES:
+                break
+        if not fingerprints:
+            return []
+
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=self.max_age_hours)
+        db = self._session()
+        try:
+            rows = (
+                db.query(Claim, ClaimFingerprint.fingerprint, ClaimFingerprint.verified_at)
+                .join(ClaimFingerprint, ClaimFingerprint.claim_id == Claim.id)
+                .options(selectinload(Claim.sources), selectinload(Claim.fact_check_sites))
+                .filter(
+                    ClaimFingerprint.fingerprint.in_(fingerprints),
+                    ClaimFingerprint.verified_at >= cutoff,
+                    Claim.credibility_score.isnot(None),
+                )
+                .order_by(ClaimFingerprint.verified_at.desc())
+                .all()
+            )
+            verdicts = {}
+            for claim, fingerprint, verified_at in rows:
+                if fingerprint not in verdicts:
+                    verdicts[fingerprint] = _verdict(claim, verified_at)
+        finally:
+            db.close()
+
+        with self._lock:
+            self.lookups += 1
+            if verdicts:
+                self.hits += 1
+        return list(verdicts.values())[:limit]
+
+    def for_article(self, title: str, body: str) -> List[Dict[str, Any]]:
+        if not config.CLAIM_CACHE_ENABLED:
+            return []
+        return self.lookup(candidate_texts(title, body))
+
+    def for_query(self, query: str) -> List[Dict[str, Any]]:
+        if not config.CLAIM_CACHE_ENABLED or not query:
+            return []
+        return self.lookup([query], limit=1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            }
+
+claim_verdict_cache = ClaimVerdictCache()
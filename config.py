@@ -16,4 +16,90 @@ DEBUG = os.getenv("DEBUG", "false").lower() == "true"
 
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-NEWS_API_KEY = os.getenv("NEWS_API_KEY")
\ No newline at end of file
+NEWS_API_KEY = os.getenv("NEWS_API_KEY")
+
+ANALYSIS_WORKER_CONCURRENCY = int(os.getenv("ANALYSIS_WORKER_CONCURRENCY", 4))
+EMBEDDED_ANALYSIS_WORKERS = int(os.getenv("EMBEDDED_ANALYSIS_WORKERS", 0))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+JOB_VISIBILITY_TIMEOUT_SECONDS = int(os.getenv("JOB_VISIBILITY_TIMEOUT_SECONDS", 300))
+JOB_RETRY_BACKOFF_SECONDS = int(os.getenv("JOB_RETRY_BACKOFF_SECONDS", 30))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", 2))
+
+SEARCH_MAX_WORKERS = int(os.getenv("SEARCH_MAX_WORKERS", 8))
+SEARCH_TIMEOUT_SECONDS = float(os.getenv("SEARCH_TIMEOUT_SECONDS", 20))
+
+SEARCH_CACHE_TTL_SECONDS = int(os.getenv("SEARCH_CACHE_TTL_SECONDS", 6 * 3600))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", 5000))
+SEARCH_CACHE_BACKEND = os.getenv("SEARCH_CACHE_BACKEND", "memory").lower()
+
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+DEDUP_SIMILARITY_THRESHOLD = float(os.getenv("DEDUP_SIMILARITY_THRESHOLD", 0.95))
+
+PROGRESS_FLUSH_INTERVAL_SECONDS = float(os.getenv("PROGRESS_FLUSH_INTERVAL_SECONDS", 5))
+PROGRESS_STREAM_KEEPALIVE_SECONDS = float(os.getenv("PROGRESS_STREAM_KEEPALIVE_SECONDS", 15))
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+ANALYSIS_PIPELINED = os.getenv("ANALYSIS_PIPELINED", "true").lower() == "true"
+ANALYSIS_STREAMING = os.getenv("ANALYSIS_STREAMING", "true").lower() == "true"
+
+POST_BATCH_MAX_SIZE = int(os.getenv("POST_BATCH_MAX_SIZE", 500))
+LITE_BATCH_SIZE = int(os.getenv("LITE_BATCH_SIZE", 20))
+LITE_BATCH_MAX_CHARS = int(os.getenv("LITE_BATCH_MAX_CHARS", 40000))
+
+CLAIM_CACHE_ENABLED = os.getenv("CLAIM_CACHE_ENABLED", "true").lower() == "true"
+CLAIM_CACHE_MAX_AGE_HOURS = float(os.getenv("CLAIM_CACHE_MAX_AGE_HOURS", 72))
+CLAIM_CACHE_MAX_CONTEXT = int(os.getenv("CLAIM_CACHE_MAX_CONTEXT", 20))
+
+GEMINI_RATE_PER_SECOND = float(os.getenv("GEMINI_RATE_PER_SECOND", 10))
+GEMINI_BURST = float(os.getenv("GEMINI_BURST", 20))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", 16))
+TAVILY_RATE_PER_SECOND = float(os.getenv("TAVILY_RATE_PER_SECOND", 5))
+TAVILY_BURST = float(os.getenv("TAVILY_BURST", 10))
+TAVILY_MAX_CONCURRENCY = int(os.getenv("TAVILY_MAX_CONCURRENCY", 8))
+
+ANALYSIS_DEADLINE_SECONDS = float(os.getenv("ANALYSIS_DEADLINE_SECONDS", 120))
+ANALYSIS_MIN_CALL_SECONDS = float(os.getenv("ANALYSIS_MIN_CALL_SECONDS", 15))
+ANALYSIS_MAX_TOOL_ROUNDS = int(os.getenv("ANALYSIS_MAX_TOOL_ROUNDS", 3))
+ANALYSIS_MAX_SEARCHES = int(os.getenv("ANALYSIS_MAX_SEARCHES", 12))
+ANALYSIS_MAX_TOKENS = int(os.getenv("ANALYSIS_MAX_TOKENS", 200000))
+
+ANALYSIS_TRIAGE = os.getenv("ANALYSIS_TRIAGE", "true").lower() == "true"
+TRIAGE_FAST_RISK_LEVELS = [r.strip().lower() for r in os.getenv("TRIAGE_FAST_RISK_LEVELS", "low").split(",") if r.strip()]
+TRIAGE_FAST_MAX_CLAIMS = int(os.getenv("TRIAGE_FAST_MAX_CLAIMS", 2))
+TRIAGE_FAST_MAX_SEARCHES = int(os.getenv("TRIAGE_FAST_MAX_SEARCHES", 0))
+
+LONG_ARTICLE_THRESHOLD_CHARS = int(os.getenv("LONG_ARTICLE_THRESHOLD_CHARS", 12000))
+ARTICLE_CHUNK_CHARS = int(os.getenv("ARTICLE_CHUNK_CHARS", 6000))
+ARTICLE_CHUNK_OVERLAP_CHARS = int(os.getenv("ARTICLE_CHUNK_OVERLAP_CHARS", 400))
+LONG_ARTICLE_MAX_CHUNKS = int(os.getenv("LONG_ARTICLE_MAX_CHUNKS", 12))
+ARTICLE_CHUNK_WORKERS = int(os.getenv("ARTICLE_CHUNK_WORKERS", 4))
+
+PROVIDER_MODE = os.getenv("PROVIDER_MODE", "live").lower()
+PROVIDER_RECORDINGS_PATH = os.getenv("PROVIDER_RECORDINGS_PATH", "provider_recordings.jsonl")
+SYNTHETIC_LATENCY_MS = float(os.getenv("SYNTHETIC_LATENCY_MS", 50))
+SYNTHETIC_TOOL_ROUNDS = int(os.getenv("SYNTHETIC_TOOL_ROUNDS", 1))
+SYNTHETIC_SEARCHES_PER_ROUND = int(os.getenv("SYNTHETIC_SEARCHES_PER_ROUND", 3))
+SYNTHETIC_CLAIMS = int(os.getenv("SYNTHETIC_CLAIMS", 5))
+
+BREAKING_NEWS_LIMIT = int(os.getenv("BREAKING_NEWS_LIMIT", 5))
+BREAKING_NEWS_WINDOW_HOURS = float(os.getenv("BREAKING_NEWS_WINDOW_HOURS", 72))
+COUNTER_RECONCILE_BATCH_SIZE = int(os.getenv("COUNTER_RECONCILE_BATCH_SIZE", 1000))
+BREAKING_NEWS_REFRESH_SECONDS = float(os.getenv("BREAKING_NEWS_REFRESH_SECONDS", 15))
+BREAKING_NEWS_REBUILD_DELAY_SECONDS = float(os.getenv("BREAKING_NEWS_REBUILD_DELAY_SECONDS", 1))
+
+SIMILAR_POSTS_LIMIT = int(os.getenv("SIMILAR_POSTS_LIMIT", 10))
+SIMILAR_MAX_CANDIDATES = int(os.getenv("SIMILAR_MAX_CANDIDATES", 2000))
+
+RECOMMENDATION_EMBEDDINGS = os.getenv("RECOMMENDATION_EMBEDDINGS", "true").lower() == "true"
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "hashing").lower()
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", 512))
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-004")
+EMBEDDING_INDEX_REFRESH_SECONDS = float(os.getenv("EMBEDDING_INDEX_REFRESH_SECONDS", 30))
+EMBEDDING_INDEX_PRUNE_SECONDS = float(os.getenv("EMBEDDING_INDEX_PRUNE_SECONDS", 300))
+
+VIEW_BUFFER_MAX_SIZE = int(os.getenv("VIEW_BUFFER_MAX_SIZE", 500))
+VIEW_BUFFER_FLUSH_SECONDS = float(os.getenv("VIEW_BUFFER_FLUSH_SECONDS", 2))
+VIEW_DEDUP_WINDOW_SECONDS = float(os.getenv("VIEW_DEDUP_WINDOW_SECONDS", 1800))
+VIEW_BUFFER_MAX_PENDING = int(os.getenv("VIEW_BUFFER_MAX_PENDING", 20000))
+VIEW_BUFFER_MAX_BACKOFF_SECONDS = float(os.getenv("VIEW_BUFFER_MAX_BACKOFF_SECONDS", 60))
@@ -0,0 +1,157 @@
+import argparse
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func, insert, literal, select, union_all, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models.post_model import Post, PostCounter, AnalysisStatus, Upvote, Downvote, View
+from query_options import load_posts
+import config
+
+logger = logging.getLogger("factline.counters")
+
+COUNTED = (("upvotes", Upvote), ("downvotes", Downvote), ("views", View))
+
+def actual_counts(db: Session, post_ids: Iterable[int]) -> Dict[int, Dict[str, int]]:
+    post_ids = list(post_ids)
+    counts = {post_id: {"upvotes": 0, "downvotes": 0, "views": 0} for post_id in post_ids}
+    if not post_ids:
+        return counts
+    for name, model in COUNTED:
+        rows = (
+            db.query(model.post_id, func.count(model.id))
+            .filter(model.post_id.in_(post_ids))
+            .group_by(model.post_id)
+            .all()
+        )
+        for post_id, count in rows:
+            counts[post_id][name] = count
+    return counts
+
+def bump(db: Session, post_id: int, upvotes: int = 0, downvotes: int = 0, views: int = 0):
+    stmt = (
+        update(PostCounter)
+        .where(PostCounter.post_id == post_id)
+        .values(
+            upvotes=PostCounter.upvotes + upvotes,
+            downvotes=PostCounter.downvotes + downvotes,
+            views=PostCounter.views + views,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if db.execute(stmt).rowcount:
+        return
+
+    db.flush()
+    try:
+        with db.begin_nested():
+            db.execute(insert(PostCounter).values(post_id=post_id, **actual_counts(db, [post_id])[post_id]))
+    except IntegrityError:
+        db.execute(stmt)
+
+def counts_for(db: Session, post_ids: Iterable[int]) -> Dict[int, Tuple[int, int, int]]:
+    post_ids = list(post_ids)
+    if not post_ids:
+        return {}
+    rows = (
+        db.query(PostCounter.post_id, PostCounter.upvotes, PostCounter.downvotes, PostCounter.views)
+        .filter(PostCounter.post_id.in_(post_ids))
+        .all()
+    )
+    return {post_id: (uv, dv, vc) for post_id, uv, dv, vc in rows}
+
+def user_votes(db: Session, user_id: int, post_ids: Iterable[int]) -> Tuple[set, set]:
+    post_ids = list(post_ids)
+    if not post_ids:
+        return set(), set()
+    rows = db.execute(union_all(
+        select(Upvote.post_id, literal(1)).where(Upvote.user_id == user_id, Upvote.post_id.in_(post_ids)),
+        select(Downvote.post_id, literal(-1)).where(Downvote.user_id == user_id, Downvote.post_id.in_(post_ids)),
+    )).all()
+    return {post_id for post_id, vote in rows if vote > 0}, {post_id for post_id, vote in rows if vote < 0}
+
+def rank_breaking_news(
+    db: Session,
+    limit: int = config.BREAKING_NEWS_LIMIT,
+    window_hours: Optional[float] = config.BREAKING_NEWS_WINDOW_HOURS,
+) -> List[Tuple[Post, int, int, int]]:
+    now = datetime.now(timezone.utc)
+    uv = func.coalesce(PostCounter.upvotes, 0)
+    dv = func.coalesce(PostCounter.downvotes, 0)
+    vc = func.coalesce(PostCounter.views, 0)
+    hours_old = (now.timestamp() - func.extract("epoch", Post.created_at)) / 3600.0
+    score = (uv * 3 + vc - dv * 2) / (1 + hours_old / 12.0)
+
+    query = (
+        db.query(Post.id, uv, dv, vc)
+        .outerjoin(PostCounter, PostCounter.post_id == Post.id)
+        .filter(Post.analysis_status == AnalysisStatus.COMPLETED)
+        .order_by(score.desc(), uv.desc(), vc.desc(), dv.asc(), Post.id.desc())
+    )
+    ranked = []
+    if window_hours:
+        ranked = query.filter(Post.created_at >= now - timedelta(hours=window_hours)).limit(limit).all()
+    if len(ranked) < limit:
+        ranked = query.limit(limit).all()
+
+    posts = {post.id: post for post in load_posts(db, [post_id for post_id, _, _, _ in ranked])}
+    return [(posts[post_id], uv, dv, vc) for post_id, uv, dv, vc in ranked if post_id in posts]
+
+def reconcile_counters(db: Session, batch_size: int = config.COUNTER_RECONCILE_BATCH_SIZE) -> Dict[str, int]:
+    stats = {"checked": 0, "created": 0, "repaired": 0, "removed": 0}
+    last_id = 0
+    while True:
+        post_ids = db.scalars(
+            select(Post.id).where(Post.id > last_id).order_by(Post.id).limit(batch_size)
+        ).all()
+        if not post_ids:
+            break
+        last_id = post_ids[-1]
+
+        actual = actual_counts(db, post_ids)
+        stored = counts_for(db, post_ids)
+        missing = [{"post_id": post_id, **actual[post_id]} for post_id in post_ids if post_id not in stored]
+        drifted = [
+            {"post_id": post_id, **actual[post_id]}
+            for post_id, values in stored.items()
+            if values != (actual[post_id]["upvotes"], actual[post_id]["downvotes"], actual[post_id]["views"])
+        ]
+        if missing:
+            db.execute(insert(PostCounter), missing)
+        if drifted:
+            db.execute(update(PostCounter), drifted)
+        db.commit()
+
+        stats["checked"] += len(post_ids)
+        stats["created"] += len(missing)
+        stats["repaired"] += len(drifted)
+
+    stats["removed"] = (
+        db.query(PostCounter)
+        .filter(~PostCounter.post_id.in_(select(Post.id)))
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile post vote and view counters with the source tables")
+    parser.add_argument("--batch-size", type=int, default=config.COUNTER_RECONCILE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if config.DEBUG else logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        stats = reconcile_counters(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+    logger.info("Reconciled counters: %s", stats)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import hashlib
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from models.post_model import Post, PostFingerprint, AnalysisStatus
+import config
+
+SIMHASH_BITS = 64
+SHINGLE_SIZE = 3
+
+def _tokens(title: str, body: str) -> List[str]:
+    text = unicodedata.normalize("NFKC", f"{title or ''}\n{body or ''}").lower()
+    return re.findall(r"\w+", text)
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+def _to_signed(value: int) -> int:
+    return value - (1 << SIMHASH_BITS) if value >= (1 << (SIMHASH_BITS - 1)) else value
+
+def _to_unsigned(value: int) -> int:
+    return value & ((1 << SIMHASH_BITS) - 1)
+
+def exact_hash(title: str, body: str) -> str:
+    return hashlib.sha256(" ".join(_tokens(title, body)).encode("utf-8")).hexdigest()
+
+def simhash(title: str, body: str) -> int:
+    tokens = _tokens(title, body)
+    if len(tokens) >= SHINGLE_SIZE:
+        features = [" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)]
+    else:
+        features = tokens
+
+    weights = [0] * SIMHASH_BITS
+    for feature in features:
+        h = _hash64(feature)
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+
+    value = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            value |= 1 << bit
+    return value
+
+def similarity(a: int, b: int) -> float:
+    distance = bin(_to_unsigned(a) ^ _to_unsigned(b)).count("1")
+    return 1 - distance / SIMHASH_BITS
+
+def _bands(value: int) -> List[int]:
+    value = _to_unsigned(value)
+    return [(value >> (16 * i)) & 0xFFFF for i in range(4)]
+
+def fingerprint_values(post_id: int, title: str, body: str) -> Dict[str, Any]:
+    value = simhash(title, body)
+    bands = _bands(value)
+    return {
+        "post_id": post_id,
+        "exact_hash": exact_hash(title, body),
+        "simhash": _to_signed(value),
+        "band0": bands[0],
+        "band1": bands[1],
+        "band2": bands[2],
+        "band3": bands[3],
+    }
+
+def build_fingerprint(post: Post) -> PostFingerprint:
+    return PostFingerprint(**fingerprint_values(post.id, post.title, post.body))
+
+def ensure_fingerprint(db: Session, post: Post) -> PostFingerprint:
+    fingerprint = db.query(PostFingerprint).filter(PostFingerprint.post_id == post.id).first()
+    if fingerprint is None:
+        fingerprint = build_fingerprint(post)
+        db.add(fingerprint)
+        db.commit()
+    return fingerprint
+
+def find_duplicate(
+    db: Session,
+    post: Post,
+    threshold: float = config.DEDUP_SIMILARITY_THRESHOLD,
+) -> Optional[Tuple[Post, float]]:
+    fingerprint = ensure_fingerprint(db, post)
+
+    completed = (
+        db.query(Post, PostFingerprint.simhash)
+        .join(PostFingerprint, PostFingerprint.post_id == Post.id)
+        .filter(Post.id != post.id, Post.analysis_status == AnalysisStatus.COMPLETED, Post.analysis_raw.isnot(None))
+    )
+
+    exact = (
+        completed.filter(PostFingerprint.exact_hash == fingerprint.exact_hash)
+        .order_by(Post.created_at.desc())
+        .first()
+    )
+    if exact:
+        return exact[0], 1.0
+
+    candidates = completed.filter(or_(
+        PostFingerprint.band0 == fingerprint.band0,
+        PostFingerprint.band1 == fingerprint.band1,
+        PostFingerprint.band2 == fingerprint.band2,
+        PostFingerprint.band3 == fingerprint.band3,
+    )).all()
+
+    best = None
+    for candidate, candidate_hash in candidates:
+        score = similarity(fingerprint.simhash, candidate_hash)
+        if score >= threshold and (best is None or score > best[1]):
+            best = (candidate, score)
+    return best
+
+def backfill_fingerprints(db: Session, batch_size: int = 500) -> int:
+    created = 0
+    while True:
+        posts = (
+            db.query(Post)
+            .outerjoin(PostFingerprint, PostFingerprint.post_id == Post.id)
+            .filter(PostFingerprint.post_id.is_(None))
+            .limit(batch_size)
+            .all()
+        )
+        if not posts:
+            return created
+        db.add_all([build_fingerprint(p) for p in posts])
+        db.commit()
+        created += len(posts)
+
+if __name__ == "__main__":
+    from database import SessionLocal
+    session = SessionLocal()
+    try:
+        print(f"Fingerprinted {backfill_fingerprints(session)} posts")
+    finally:
+        session.close()
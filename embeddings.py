@@ -0,0 +1,302 @@
+import argparse
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from claim_cache import STOPWORDS
+from models.post_model import Post, PostEmbedding, PostTag, AnalysisStatus
+from providers import provider_pool
+import config
+
+logger = logging.getLogger("factline.embeddings")
+
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+def _tokens(text: str) -> List[str]:
+    return [t for t in re.findall(r"\w+", (text or "").lower()) if len(t) > 1 and t not in STOPWORDS]
+
+class HashingEmbedder:
+    sparse = True
+
+    def __init__(self, dim: int = config.EMBEDDING_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def features(self, short_title: str, summary: str, tags: Iterable[str]) -> Counter:
+        features = Counter()
+        for field, weight in ((short_title, 2), (summary, 1)):
+            tokens = _tokens(field)
+            features.update({t: weight for t in tokens})
+            for pair in zip(tokens, tokens[1:]):
+                features[" ".join(pair)] += weight
+        for tag in tags:
+            tag = (tag or "").strip().lower()
+            if tag:
+                features[f"tag:{tag}"] += 3
+                features.update({t: 1 for t in _tokens(tag)})
+        return features
+
+    def embed(self, short_title: str, summary: str, tags: Iterable[str]) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, count in self.features(short_title, summary, tags).items():
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[bucket] += sign * (1 + math.log(count))
+        return vector
+
+    async def aembed(self, short_title: str, summary: str, tags: Iterable[str]) -> np.ndarray:
+        return self.embed(short_title, summary, tags)
+
+class GeminiEmbedder:
+    sparse = False
+
+    def __init__(self, model: str = config.EMBEDDING_MODEL):
+        self.model = model
+        self.name = f"gemini-{model}"
+
+    @staticmethod
+    def _text(short_title: str, summary: str, tags: Iterable[str]) -> str:
+        return "\n".join(part for part in (short_title, summary, ", ".join(tags)) if part)
+
+    def embed(self, short_title: str, summary: str, tags: Iterable[str]) -> np.ndarray:
+        with provider_pool.limit("gemini"):
+            response = provider_pool.gemini().models.embed_content(
+                model=self.model, contents=self._text(short_title, summary, tags)
+            )
+        return np.asarray(response.embeddings[0].values, dtype=np.float32)
+
+    async def aembed(self, short_title: str, summary: str, tags: Iterable[str]) -> np.ndarray:
+        async with provider_pool.alimit("gemini"):
+            response = await provider_pool.async_gemini().aio.models.embed_content(
+                model=self.model, contents=self._text(short_title, summary, tags)
+            )
+        return np.asarray(response.embeddings[0].values, dtype=np.float32)
+
+EMBEDDERS = {
+    "hashing": HashingEmbedder,
+    "gemini": GeminiEmbedder,
+}
+
+def get_embedder(backend: str = config.EMBEDDING_BACKEND):
+    if backend not in EMBEDDERS:
+        raise ValueError(f"EMBEDDING_BACKEND must be one of {', '.join(EMBEDDERS)}")
+    return EMBEDDERS[backend]()
+
+def _analysis_fields(out: Dict[str, Any]):
+    return out.get("short_title") or "", out.get("summary_easy") or "", out.get("tags") or []
+
+def _usable(vector: np.ndarray) -> Optional[np.ndarray]:
+    return vector.astype(np.float32) if np.any(vector) else None
+
+def embed_analysis(out: Dict[str, Any], embedder=None) -> Optional[np.ndarray]:
+    embedder = embedder or embedding_index.embedder
+    try:
+        return _usable(embedder.embed(*_analysis_fields(out)))
+    except Exception:
+        logger.warning("Embedding with %s failed", embedder.name, exc_info=True)
+        return None
+
+async def aembed_analysis(out: Dict[str, Any], embedder=None) -> Optional[np.ndarray]:
+    embedder = embedder or embedding_index.embedder
+    try:
+        return _usable(await embedder.aembed(*_analysis_fields(out)))
+    except Exception:
+        logger.warning("Embedding with %s failed", embedder.name, exc_info=True)
+        return None
+
+def store_embedding(db: Session, post_id: int, vector: Optional[np.ndarray], embedder=None):
+    if vector is None:
+        return
+    embedder = embedder or embedding_index.embedder
+    db.merge(PostEmbedding(
+        post_id=post_id,
+        model=embedder.name,
+        dim=int(vector.shape[0]),
+        vector=vector.tobytes(),
+    ))
+
+class EmbeddingIndex:
+    def __init__(
+        self,
+        embedder=None,
+        refresh_seconds: float = config.EMBEDDING_INDEX_REFRESH_SECONDS,
+        prune_seconds: float = config.EMBEDDING_INDEX_PRUNE_SECONDS,
+    ):
+        self.embedder = embedder or get_embedder()
+        self.refresh_seconds = refresh_seconds
+        self.prune_seconds = prune_seconds
+        self._lock = threading.Lock()
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._raw: Optional[np.ndarray] = None
+        self._rows: Dict[int, int] = {}
+        self._weighted: Optional[np.ndarray] = None
+        self._last_seen: Optional[datetime] = None
+        self._refreshed_at = 0.0
+        self._pruned_at = time.monotonic()
+        self.refreshes = 0
+        self.pruned = 0
+        self.queries = 0
+
+    def refresh(self, db: Session, force: bool = False):
+        with self._lock:
+            if not force and time.monotonic() - self._refreshed_at < self.refresh_seconds:
+                return
+            self._refreshed_at = time.monotonic()
+            if self._refreshed_at - self._pruned_at >= self.prune_seconds:
+                self._pruned_at = self._refreshed_at
+                live = set(db.scalars(
+                    select(PostEmbedding.post_id).where(PostEmbedding.model == self.embedder.name)
+                ).all())
+                self._remove([post_id for post_id in self._rows if post_id not in live])
+            query = select(PostEmbedding.post_id, PostEmbedding.vector, PostEmbedding.updated_at).where(
+                PostEmbedding.model == self.embedder.name
+            )
+            if self._last_seen is not None:
+                query = query.where(PostEmbedding.updated_at >= self._last_seen - REFRESH_OVERLAP)
+            rows = db.execute(query).all()
+            if not rows:
+                return
+
+            vectors = np.stack([np.frombuffer(vector, dtype=np.float32) for _, vector, _ in rows])
+            if self._raw is None:
+                self._raw = np.zeros((0, vectors.shape[1]), dtype=np.float32)
+            appended, appended_ids = [], []
+            for (post_id, _, _), vector in zip(rows, vectors):
+                row = self._rows.get(post_id)
+                if row is None:
+                    self._rows[post_id] = len(self._ids) + len(appended)
+                    appended.append(vector)
+                    appended_ids.append(post_id)
+                else:
+                    self._raw[row] = vector
+            if appended:
+                self._raw = np.vstack([self._raw, np.stack(appended)])
+                self._ids = np.concatenate([self._ids, np.array(appended_ids, dtype=np.int64)])
+            self._last_seen = max(updated_at for _, _, updated_at in rows)
+            self._weighted = None
+            self.refreshes += 1
+
+    def _remove(self, post_ids: Iterable[int]):
+        rows = [self._rows[post_id] for post_id in post_ids if post_id in self._rows]
+        if not rows:
+            return
+        keep = np.ones(len(self._ids), dtype=bool)
+        keep[rows] = False
+        self._raw = self._raw[keep]
+        self._ids = self._ids[keep]
+        self._rows = {int(post_id): row for row, post_id in enumerate(self._ids)}
+        self._weighted = None
+        self.pruned += len(rows)
+
+    def forget(self, post_id: int):
+        with self._lock:
+            self._remove([post_id])
+
+    def _matrix(self) -> np.ndarray:
+        if self._weighted is None:
+            weighted = self._raw
+            if self.embedder.sparse:
+                df = np.count_nonzero(self._raw, axis=0)
+                weighted = self._raw * (np.log((1 + len(self._ids)) / (1 + df)) + 1).astype(np.float32)
+            norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+            self._weighted = weighted / np.where(norms == 0, 1, norms)
+        return self._weighted
+
+    def similar(self, db: Session, weights: Dict[int, float], exclude: Iterable[int] = (), k: int = 10) -> List[int]:
+        self.refresh(db)
+        with self._lock:
+            self.queries += 1
+            source = [(self._rows[post_id], weight) for post_id, weight in weights.items() if post_id in self._rows]
+            if not source:
+                return []
+            matrix = self._matrix()
+            ids = self._ids
+            rows, source_weights = zip(*source)
+            profile = np.asarray(source_weights, dtype=np.float32) @ matrix[list(rows)]
+            excluded = [self._rows[post_id] for post_id in exclude if post_id in self._rows]
+
+        scores = matrix @ profile
+        scores[excluded] = -np.inf
+        k = min(k, len(ids) - len(excluded))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [int(ids[i]) for i in top if scores[i] > 0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "model": self.embedder.name,
+                "posts": len(self._ids),
+                "refreshes": self.refreshes,
+                "pruned": self.pruned,
+                "queries": self.queries,
+            }
+
+embedding_index = EmbeddingIndex()
+
+def backfill_embeddings(db: Session, batch_size: int = 500) -> int:
+    embedder = embedding_index.embedder
+    embedded = 0
+    last_id = 0
+    while True:
+        posts = db.execute(
+            select(Post.id, Post.short_title, Post.summary_easy)
+            .where(
+                Post.id > last_id,
+                Post.analysis_status == AnalysisStatus.COMPLETED,
+                ~select(PostEmbedding.post_id)
+                .where(PostEmbedding.post_id == Post.id, PostEmbedding.model == embedder.name)
+                .exists(),
+            )
+            .order_by(Post.id)
+            .limit(batch_size)
+        ).all()
+        if not posts:
+            return embedded
+        last_id = posts[-1][0]
+        tags: Dict[int, List[str]] = {}
+        for post_id, tag in db.execute(
+            select(PostTag.post_id, PostTag.tag).where(PostTag.post_id.in_([p[0] for p in posts]))
+        ):
+            tags.setdefault(post_id, []).append(tag)
+        for post_id, short_title, summary in posts:
+            vector = embed_analysis({
+                "short_title": short_title,
+                "summary_easy": summary,
+                "tags": tags.get(post_id, []),
+            }, embedder)
+            store_embedding(db, post_id, vector, embedder)
+        db.commit()
+        embedded += len(posts)
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed completed posts that have no embedding for the configured backend")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if config.DEBUG else logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        embedded = backfill_embeddings(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+    logger.info("Embedded %d posts with %s", embedded, embedding_index.embedder.name)
+
+if __name__ == "__main__":
+    main()
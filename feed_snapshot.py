@@ -0,0 +1,136 @@
+import copy
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+import counters
+import schemas
+import config
+
+logger = logging.getLogger("factline.feed")
+
+class BreakingNewsSnapshot:
+    def __init__(
+        self,
+        refresh_seconds: float = config.BREAKING_NEWS_REFRESH_SECONDS,
+        rebuild_delay: float = config.BREAKING_NEWS_REBUILD_DELAY_SECONDS,
+        session_factory: Optional[Callable] = None,
+    ):
+        self.refresh_seconds = refresh_seconds
+        self.rebuild_delay = rebuild_delay
+        self._session_factory = session_factory
+        self._views: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        self._computed_at = 0.0
+        self._stale = True
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._scheduled: Optional[threading.Timer] = None
+        self.hits = 0
+        self.refreshes = 0
+        self.last_refresh_seconds = 0.0
+
+    def _session(self):
+        if self._session_factory is None:
+            from database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def compute(self, db) -> List[Dict[str, Any]]:
+        return [
+            schemas.PostOut.from_orm(post).model_copy(update={
+                "upvote_downvote_count": uv - dv,
+                "view_count": vc,
+            }).model_dump(mode="json")
+            for post, uv, dv, vc in counters.rank_breaking_news(db)
+        ]
+
+    def _refresh(self) -> Dict[str, List[Dict[str, Any]]]:
+        started = time.monotonic()
+        with self._lock:
+            self._stale = False
+        db = self._session()
+        try:
+            posts = self.compute(db)
+        except Exception:
+            with self._lock:
+                self._stale = True
+            raise
+        finally:
+            db.close()
+        views = {
+            "full": posts,
+            "summary": [{field: post[field] for field in schemas.PostSummary.model_fields} for post in posts],
+        }
+        with self._lock:
+            self._views = views
+            self._computed_at = time.monotonic()
+            self.refreshes += 1
+            self.last_refresh_seconds = self._computed_at - started
+        return views
+
+    def refresh(self) -> Dict[str, List[Dict[str, Any]]]:
+        with self._refresh_lock:
+            return self._refresh()
+
+    def _schedule(self, delay: float = 0.0):
+        with self._lock:
+            if self._scheduled is not None:
+                return
+            self._scheduled = threading.Timer(delay, self._background_refresh)
+            self._scheduled.daemon = True
+            self._scheduled.start()
+
+    def _background_refresh(self):
+        with self._lock:
+            self._scheduled = None
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            self._refresh()
+        except Exception:
+            logger.exception("Failed to rebuild the breaking news snapshot")
+        finally:
+            self._refresh_lock.release()
+
+    def _current(self) -> Dict[str, List[Dict[str, Any]]]:
+        with self._lock:
+            views = self._views
+            fresh = not self._stale and time.monotonic() - self._computed_at < self.refresh_seconds
+        if views is None:
+            with self._refresh_lock:
+                with self._lock:
+                    views = self._views
+                return views if views is not None else self._refresh()
+        if not fresh:
+            self._schedule()
+        with self._lock:
+            self.hits += 1
+        return views
+
+    def get(self, db, user_id: int, view: str = "full") -> List[Dict[str, Any]]:
+        posts = self._current()[view]
+        upvoted_ids, downvoted_ids = counters.user_votes(db, user_id, [post["id"] for post in posts])
+        result = []
+        for post in posts:
+            post = copy.copy(post)
+            post["is_upvoted"] = post["id"] in upvoted_ids
+            post["is_downvoted"] = post["id"] in downvoted_ids
+            result.append(post)
+        return result
+
+    def invalidate(self):
+        with self._lock:
+            self._stale = True
+        self._schedule(self.rebuild_delay)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "posts": len(self._views["full"]) if self._views is not None else 0,
+                "hits": self.hits,
+                "refreshes": self.refreshes,
+                "age_seconds": time.monotonic() - self._computed_at if self._views is not None else None,
+                "last_refresh_seconds": self.last_refresh_seconds,
+            }
+
+breaking_news_snapshot = BreakingNewsSnapshot()
@@ -1,14 +1,10 @@
-from newsapi import NewsApiClient
-import google.genai as genai
 from google.genai import types
-from config import NEWS_API_KEY, GOOGLE_API_KEY
+from providers import provider_pool
 import random
 
-newsapi = NewsApiClient(api_key=NEWS_API_KEY)
-
 def fetch_real_article(country: str) -> dict:
     try:
-        response = newsapi.get_top_headlines(
+        response = provider_pool.newsapi().get_top_headlines(
             country=country.lower(),
             page_size=10
         )
@@ -49,7 +45,7 @@ def doctor_article_with_gemini(article: dict) -> dict:
     if not article or not article.get('body'):
         return None
 
-    client = genai.Client(api_key=GOOGLE_API_KEY)
+    client = provider_pool.gemini()
 
     prompt = f"""
     You are a misinformation generator for a game. Your task is to rewrite the following news summary to include subtle, believable falsehoods or a slightly altered narrative. The goal is to make it difficult, but not impossible, for a user to tell that it's fake.
@@ -68,13 +64,14 @@ def doctor_article_with_gemini(article: dict) -> dict:
     """
 
     try:
-        response = client.models.generate_content(
-            model="models/gemini-2.5-flash",
-            contents=types.Content(
-                role="user",
-                parts=[types.Part.from_text(text=prompt)]
+        with provider_pool.limit("gemini"):
+            response = client.models.generate_content(
+                model="models/gemini-2.5-flash",
+                contents=types.Content(
+                    role="user",
+                    parts=[types.Part.from_text(text=prompt)]
+                )
             )
-        )
         doctored_body = response.text.strip()
         
         return {
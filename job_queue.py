@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session
+from models.job_model import AnalysisJob, JobStatus
+from models.post_model import Post, AnalysisStatus
+import config
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+def enqueue(
+    db: Session,
+    post_id: Optional[int],
+    kind: str = "analyze",
+    payload: Optional[Dict[str, Any]] = None,
+    delay_seconds: float = 0,
+    commit: bool = True,
+) -> AnalysisJob:
+    job = AnalysisJob(
+        kind=kind,
+        post_id=post_id,
+        payload=payload or {},
+        status=JobStatus.QUEUED,
+        attempts=0,
+        max_attempts=config.JOB_MAX_ATTEMPTS,
+        run_after=_utcnow() + timedelta(seconds=delay_seconds),
+    )
+    db.add(job)
+    if commit:
+        db.commit()
+    return job
+
+def claim(db: Session, worker_id: str) -> Optional[AnalysisJob]:
+    while True:
+        now = _utcnow()
+        job = (
+            db.query(AnalysisJob)
+            .filter(or_(
+                and_(AnalysisJob.status == JobStatus.QUEUED, AnalysisJob.run_after <= now),
+                and_(AnalysisJob.status == JobStatus.RUNNING, AnalysisJob.locked_until < now),
+            ))
+            .order_by(AnalysisJob.run_after, AnalysisJob.id)
+            .with_for_update(skip_locked=True)
+            .populate_existing()
+            .first()
+        )
+        if not job:
+            db.commit()
+            return None
+
+        if job.status == JobStatus.RUNNING and job.attempts >= job.max_attempts:
+            _dead_letter(db, job, job.last_error or "Visibility timeout exceeded")
+            db.commit()
+            continue
+
+        job.status = JobStatus.RUNNING
+        job.attempts += 1
+        job.locked_by = worker_id
+        job.locked_until = now + timedelta(seconds=config.JOB_VISIBILITY_TIMEOUT_SECONDS)
+        db.commit()
+        return job
+
+def extend_lease(db: Session, job_ids: Iterable[int], worker_id: str):
+    job_ids = list(job_ids)
+    if not job_ids:
+        return
+    db.execute(
+        update(AnalysisJob)
+        .where(
+            AnalysisJob.id.in_(job_ids),
+            AnalysisJob.locked_by == worker_id,
+            AnalysisJob.status == JobStatus.RUNNING,
+        )
+        .values(locked_until=_utcnow() + timedelta(seconds=config.JOB_VISIBILITY_TIMEOUT_SECONDS))
+    )
+    db.commit()
+
+def _release(db: Session, job: AnalysisJob, worker_id: str, **values) -> bool:
+    result = db.execute(
+        update(AnalysisJob)
+        .where(
+            AnalysisJob.id == job.id,
+            AnalysisJob.locked_by == worker_id,
+            AnalysisJob.status == JobStatus.RUNNING,
+        )
+        .values(locked_by=None, locked_until=None, **values)
+    )
+    if not result.rowcount:
+        db.rollback()
+        return False
+    return True
+
+def complete(db: Session, job: AnalysisJob, worker_id: str) -> bool:
+    if not _release(db, job, worker_id, status=JobStatus.SUCCEEDED):
+        return False
+    db.commit()
+    return True
+
+def fail(db: Session, job: AnalysisJob, error: str, worker_id: str) -> Optional[JobStatus]:
+    if job.attempts >= job.max_attempts:
+        if not _release(db, job, worker_id, status=JobStatus.DEAD, last_error=error):
+            return None
+        _on_dead(db, job, error)
+    else:
+        backoff = config.JOB_RETRY_BACKOFF_SECONDS * (2 ** (job.attempts - 1))
+        if not _release(
+            db, job, worker_id,
+            status=JobStatus.QUEUED,
+            last_error=error,
+            run_after=_utcnow() + timedelta(seconds=backoff),
+        ):
+            return None
+        post = db.query(Post).filter(Post.id == job.post_id).first() if job.post_id else None
+        if post:
+            post.analysis_status = AnalysisStatus.PENDING
+            post.status_message = f"Analysis retry {job.attempts + 1}/{job.max_attempts} scheduled"
+
+    db.commit()
+    return job.status
+
+def requeue_dead(db: Session, job_id: int) -> Optional[AnalysisJob]:
+    job = db.query(AnalysisJob).filter(
+        AnalysisJob.id == job_id, AnalysisJob.status == JobStatus.DEAD
+    ).first()
+    if not job:
+        return None
+    job.status = JobStatus.QUEUED
+    job.attempts = 0
+    job.run_after = _utcnow()
+    db.commit()
+    return job
+
+def _dead_letter(db: Session, job: AnalysisJob, error: str):
+    job.status = JobStatus.DEAD
+    job.last_error = error
+    job.locked_by = None
+    job.locked_until = None
+    _on_dead(db, job, error)
+
+def _on_dead(db: Session, job: AnalysisJob, error: str):
+    if job.kind == "lite_batch":
+        _split_lite_batch(db, job)
+        return
+
+    post = db.query(Post).filter(Post.id == job.post_id).first() if job.post_id else None
+    if post:
+        post.analysis_status = AnalysisStatus.FAILED
+        post.status_message = f"Analysis failed: {error}"
+
+def _split_lite_batch(db: Session, job: AnalysisJob):
+    payload = job.payload or {}
+    post_ids = [row.id for row in db.query(Post.id).filter(Post.id.in_(payload.get("post_ids", [])))]
+    for post_id in post_ids:
+        enqueue(db, post_id, payload={"force": payload.get("force", False)}, commit=False)
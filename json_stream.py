@@ -0,0 +1,113 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+Event = Tuple[str, str, Any]
+
+_INVALID = object()
+
+class IncrementalJSONParser:
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.stack: List[str] = []
+        self.in_string = False
+        self.escape = False
+        self.started = False
+        self.done = False
+
+        self.key: Optional[str] = None
+        self.key_start: Optional[int] = None
+        self.value_start: Optional[int] = None
+        self.item_start: Optional[int] = None
+
+        self.fields: Dict[str, Any] = {}
+        self.items: Dict[str, List[Any]] = {}
+
+    def feed(self, chunk: str) -> List[Event]:
+        self.buffer += chunk
+        events: List[Event] = []
+
+        while self.pos < len(self.buffer) and not self.done:
+            i = self.pos
+            ch = self.buffer[i]
+            self.pos += 1
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    if len(self.stack) == 1 and self.value_start is None and self.key_start is not None:
+                        key = self._load(self.key_start, i + 1)
+                        self.key = key if isinstance(key, str) else None
+                        self.key_start = None
+                continue
+
+            if not self.started:
+                if ch == "{":
+                    self.started = True
+                    self.stack.append("{")
+                continue
+
+            depth = len(self.stack)
+            in_top_array = depth == 2 and self.stack[1] == "["
+            if in_top_array and self.item_start is None and not ch.isspace() and ch not in ",]":
+                self.item_start = i
+
+            if ch == '"':
+                self.in_string = True
+                if depth == 1 and self.value_start is None:
+                    self.key_start = i
+            elif ch == ":" and depth == 1 and self.value_start is None:
+                self.value_start = self.pos
+            elif ch in "{[":
+                if depth == 1 and ch == "[" and self.key is not None:
+                    self.items[self.key] = []
+                self.stack.append(ch)
+            elif ch in "}]":
+                if in_top_array and ch == "]":
+                    self._end_item(i, events)
+                self.stack.pop()
+                if not self.stack:
+                    self._end_field(i, events)
+                    self.done = True
+            elif ch == ",":
+                if depth == 1:
+                    self._end_field(i, events)
+                elif in_top_array:
+                    self._end_item(i, events)
+
+        return events
+
+    def _load(self, start: int, end: int) -> Any:
+        try:
+            return json.loads(self.buffer[start:end])
+        except json.JSONDecodeError:
+            return _INVALID
+
+    def _end_item(self, end: int, events: List[Event]):
+        if self.item_start is None or self.key is None:
+            return
+        item = self._load(self.item_start, end)
+        self.item_start = None
+        if item is not _INVALID:
+            self.items.setdefault(self.key, []).append(item)
+            events.append(("item", self.key, item))
+
+    def _end_field(self, end: int, events: List[Event]):
+        if self.key is not None and self.value_start is not None:
+            value = self._load(self.value_start, end)
+            if value is not _INVALID:
+                self.fields[self.key] = value
+                self.items.pop(self.key, None)
+                events.append(("field", self.key, value))
+        self.key = None
+        self.key_start = None
+        self.value_start = None
+
+    def partial(self) -> Dict[str, Any]:
+        out = {key: list(items) for key, items in self.items.items()}
+        out.update(self.fields)
+        return out
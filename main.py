@@ -2,14 +2,38 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from routes import auth, post, game
+from auth_deps import get_current_editor
+from models.user import User
+from worker import AnalysisWorker
+from providers import provider_pool
+from search_cache import search_cache
+from claim_cache import claim_verdict_cache
+from progress import progress_registry
+from feed_snapshot import breaking_news_snapshot
+from embeddings import embedding_index
+from view_buffer import view_buffer
+import config
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    embedded_worker = None
+    if config.EMBEDDED_ANALYSIS_WORKERS > 0:
+        embedded_worker = AnalysisWorker(concurrency=config.EMBEDDED_ANALYSIS_WORKERS)
+        embedded_worker.start()
+    yield
+    view_buffer.close()
+    if embedded_worker:
+        embedded_worker.stop()
 
 app = FastAPI(
     title="Factline API",
     description="Factline Backend",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -27,3 +51,15 @@ app.include_router(game.router, tags=["Game"])
 @app.get("/")
 async def root():
     return {"message": "Welcome to the Factline API"}
+
+@app.get("/metrics")
+async def metrics(current_user: User = Depends(get_current_editor)):
+    return {
+        "providers": provider_pool.stats(),
+        "search_cache": search_cache.stats(),
+        "claim_cache": claim_verdict_cache.stats(),
+        "progress": progress_registry.stats(),
+        "breaking_news": breaking_news_snapshot.stats(),
+        "embeddings": embedding_index.stats(),
+        "views": view_buffer.stats(),
+    }
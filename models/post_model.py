@@ -1,5 +1,5 @@
 from sqlalchemy import (
-    Column, Integer, String, DateTime, ForeignKey, JSON, Enum, UniqueConstraint, Float, Text
+    Column, Integer, String, DateTime, ForeignKey, JSON, Enum, UniqueConstraint, Float, Text, BigInteger, Index, LargeBinary
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -55,6 +55,59 @@ class Post(Base):
     latitude = Column(Float, nullable=True, index=True)
     longitude = Column(Float, nullable=True, index=True)
 
+    __table_args__ = (
+        Index("ix_posts_status_created_at", "analysis_status", "created_at", "id"),
+        Index("ix_posts_risk_type_created_at", "risk_type", "created_at", "id"),
+        Index("ix_posts_created_at_id", "created_at", "id"),
+    )
+
+class PostCounter(Base):
+    __tablename__ = "post_counters"
+
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    upvotes = Column(Integer, nullable=False, default=0)
+    downvotes = Column(Integer, nullable=False, default=0)
+    views = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+class PostEmbedding(Base):
+    __tablename__ = "post_embeddings"
+
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    model = Column(String, nullable=False)
+    dim = Column(Integer, nullable=False)
+    vector = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True)
+
+class PostFingerprint(Base):
+    __tablename__ = "post_fingerprints"
+
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    exact_hash = Column(String(64), index=True, nullable=False)
+    simhash = Column(BigInteger, nullable=False)
+    band0 = Column(Integer, index=True, nullable=False)
+    band1 = Column(Integer, index=True, nullable=False)
+    band2 = Column(Integer, index=True, nullable=False)
+    band3 = Column(Integer, index=True, nullable=False)
+
+class AnalysisStats(Base):
+    __tablename__ = "analysis_stats"
+
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    elapsed_seconds = Column(Float, nullable=False)
+    model_calls = Column(Integer, nullable=False, default=0)
+    tool_rounds = Column(Integer, nullable=False, default=0)
+    searches = Column(Integer, nullable=False, default=0)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    output_tokens = Column(Integer, nullable=False, default=0)
+    total_tokens = Column(Integer, nullable=False, default=0)
+    budget_exhausted = Column(String, nullable=True)
+    route = Column(String, nullable=True, index=True)
+    risk_level = Column(String, nullable=True)
+    claim_count = Column(Integer, nullable=True)
+    route_reason = Column(String, nullable=True)
+    completed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
 class PostTag(Base):
     __tablename__ = "post_tags"
 
@@ -64,6 +117,21 @@ class PostTag(Base):
 
     post = relationship("Post", back_populates="tags")
 
+    __table_args__ = (
+        Index("ix_post_tags_tag_post_id", "tag", "post_id"),
+    )
+
+class PostKeyword(Base):
+    __tablename__ = "post_keywords"
+
+    id = Column(Integer, primary_key=True, index=True)
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False, index=True)
+    keyword = Column(String, nullable=False)
+
+    __table_args__ = (
+        Index("ix_post_keywords_keyword_post_id", "keyword", "post_id"),
+    )
+
 class RedFlag(Base):
     __tablename__ = "red_flags"
 
@@ -117,6 +185,13 @@ class FactCheckSite(Base):
 
     claim = relationship("Claim", back_populates="fact_check_sites")
 
+class ClaimFingerprint(Base):
+    __tablename__ = "claim_fingerprints"
+
+    claim_id = Column(Integer, ForeignKey("claims.id", ondelete="CASCADE"), primary_key=True)
+    fingerprint = Column(String(64), index=True, nullable=False)
+    verified_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
 class Upvote(Base):
     __tablename__ = "upvotes"
 
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy.sql import func
+from db_base import Base
+
+class SearchCacheEntry(Base):
+    __tablename__ = "search_cache_entries"
+
+    key = Column(String, primary_key=True)
+    max_results = Column(Integer, nullable=False)
+    results = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
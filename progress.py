@@ -0,0 +1,312 @@
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from sqlalchemy import update
+from models.post_model import Post, AnalysisStatus
+import config
+
+logger = logging.getLogger("factline.progress")
+
+TERMINAL_STATUSES = (AnalysisStatus.COMPLETED, AnalysisStatus.FAILED)
+
+PARTIAL_COLUMNS = {"credibility_score": int, "bias": str, "sentiment": str, "risk_type": str}
+
+class ProgressRegistry:
+    def __init__(
+        self,
+        flush_interval: float = config.PROGRESS_FLUSH_INTERVAL_SECONDS,
+        session_factory: Optional[Callable] = None,
+        local_reads: bool = config.EMBEDDED_ANALYSIS_WORKERS > 0,
+    ):
+        self.flush_interval = flush_interval
+        self.local_reads = local_reads
+        self._session_factory = session_factory
+        self._states: Dict[int, Dict[str, Any]] = {}
+        self._last_flush: Dict[int, float] = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._flusher = None
+        self.listeners: List[Callable[[int, Dict[str, Any]], None]] = []
+        self.updates = 0
+        self.writes = 0
+
+    def _session(self):
+        if self._session_factory is None:
+            from database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def update(
+        self,
+        post_id: int,
+        progress: float,
+        message: str,
+        status: AnalysisStatus = None,
+    ) -> Dict[str, Any]:
+        snapshot, due = self._record(post_id, progress, message, status)
+        self.publish(post_id, snapshot)
+        if due:
+            self.flush(post_id)
+        self._ensure_flusher()
+        return snapshot
+
+    async def aupdate(
+        self,
+        post_id: int,
+        progress: float,
+        message: str,
+        status: AnalysisStatus = None,
+    ) -> Dict[str, Any]:
+        snapshot, due = self._record(post_id, progress, message, status)
+        self.publish(post_id, snapshot)
+        if due:
+            await self.aflush(post_id)
+        self._ensure_flusher()
+        return snapshot
+
+    def _record(self, post_id: int, progress: float, message: str, status: Optional[AnalysisStatus]):
+        now = time.monotonic()
+        with self._lock:
+            state = self._states.get(post_id)
+            status_changed = status is not None and (state is None or state["analysis_status"] != status)
+            if state is not None and not status_changed:
+                progress = max(progress, state["analysis_progress"])
+            state = {
+                "post_id": post_id,
+                "analysis_status": status or (state["analysis_status"] if state else AnalysisStatus.PROCESSING),
+                "analysis_progress": progress,
+                "status_message": message,
+                "partial_result": state.get("partial_result") if state else None,
+            }
+            self._states[post_id] = state
+            self._dirty.add(post_id)
+            self.updates += 1
+            due = status_changed or now - self._last_flush.get(post_id, 0) >= self.flush_interval
+            return dict(state), due
+
+    def update_partial(self, post_id: int, partial: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            state = self._states.get(post_id)
+            if state is None:
+                return None
+            merged = dict(state.get("partial_result") or {})
+            merged.update(partial)
+            state["partial_result"] = merged
+            self._dirty.add(post_id)
+            snapshot = dict(state)
+        self.publish(post_id, snapshot)
+        return snapshot
+
+    def publish(self, post_id: int, state: Dict[str, Any]):
+        for listener in self.listeners:
+            try:
+                listener(post_id, dict(state))
+            except Exception:
+                logger.exception("Progress listener failed for post %s", post_id)
+
+    def get(self, post_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            state = self._states.get(post_id)
+            return dict(state) if state else None
+
+    def local_state(self, post_id: int) -> Optional[Dict[str, Any]]:
+        return self.get(post_id) if self.local_reads else None
+
+    def finish(self, post_id: int, state: Optional[Dict[str, Any]] = None):
+        with self._lock:
+            self._states.pop(post_id, None)
+            self._last_flush.pop(post_id, None)
+            self._dirty.discard(post_id)
+        if state is not None:
+            self.publish(post_id, state)
+
+    def _pending_statement(self, post_id: int):
+        with self._lock:
+            state = self._states.get(post_id)
+            if state is None or post_id not in self._dirty:
+                return None
+            self._dirty.discard(post_id)
+            self._last_flush[post_id] = time.monotonic()
+            values = {
+                "analysis_status": state["analysis_status"],
+                "analysis_progress": state["analysis_progress"],
+                "status_message": state["status_message"],
+            }
+            partial = state.get("partial_result")
+            if partial:
+                values["analysis_raw"] = dict(partial)
+                for column, column_type in PARTIAL_COLUMNS.items():
+                    value = partial.get(column)
+                    if isinstance(value, column_type) and not isinstance(value, bool):
+                        values[column] = value
+
+        stmt = update(Post).where(Post.id == post_id)
+        if values["analysis_status"] not in TERMINAL_STATUSES:
+            stmt = stmt.where(Post.analysis_status.notin_(TERMINAL_STATUSES))
+        return stmt.values(**values)
+
+    def _flushed(self, post_id: int, ok: bool):
+        with self._lock:
+            if ok:
+                self.writes += 1
+            else:
+                self._dirty.add(post_id)
+
+    def flush(self, post_id: int):
+        stmt = self._pending_statement(post_id)
+        if stmt is None:
+            return
+
+        db = self._session()
+        try:
+            db.execute(stmt)
+            db.commit()
+            self._flushed(post_id, True)
+        except Exception:
+            logger.exception("Failed to flush progress for post %s", post_id)
+            db.rollback()
+            self._flushed(post_id, False)
+        finally:
+            db.close()
+
+    async def aflush(self, post_id: int):
+        stmt = self._pending_statement(post_id)
+        if stmt is None:
+            return
+
+        from database import get_async_sessionmaker
+        async with get_async_sessionmaker()() as db:
+            try:
+                await db.execute(stmt)
+                await db.commit()
+                self._flushed(post_id, True)
+            except Exception:
+                logger.exception("Failed to flush progress for post %s", post_id)
+                await db.rollback()
+                self._flushed(post_id, False)
+
+    def flush_all(self):
+        with self._lock:
+            dirty = list(self._dirty)
+        for post_id in dirty:
+            self.flush(post_id)
+
+    def _ensure_flusher(self):
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_loop, name="progress-flusher", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            now = time.monotonic()
+            with self._lock:
+                due = [
+                    post_id for post_id in self._dirty
+                    if now - self._last_flush.get(post_id, 0) >= self.flush_interval
+                ]
+            for post_id in due:
+                self.flush(post_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": len(self._states),
+                "updates": self.updates,
+                "writes": self.writes,
+            }
+
+def load_state(db, post_id: int) -> Optional[Dict[str, Any]]:
+    row = (
+        db.query(Post.id, Post.analysis_status, Post.analysis_progress, Post.status_message, Post.analysis_raw)
+        .filter(Post.id == post_id)
+        .first()
+    )
+    if row is None:
+        return None
+    return {
+        "post_id": row.id,
+        "analysis_status": row.analysis_status,
+        "analysis_progress": row.analysis_progress,
+        "status_message": row.status_message,
+        "partial_result": row.analysis_raw if row.analysis_status == AnalysisStatus.PROCESSING else None,
+    }
+
+class ProgressBroker:
+    def __init__(
+        self,
+        registry: ProgressRegistry,
+        poll_interval: float = config.PROGRESS_FLUSH_INTERVAL_SECONDS,
+    ):
+        self.registry = registry
+        self.poll_interval = poll_interval
+        self._subscribers: Dict[int, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._pollers: Dict[int, asyncio.Task] = {}
+        self._last_seen: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        registry.listeners.append(self.publish)
+
+    def publish(self, post_id: int, state: Dict[str, Any]):
+        with self._lock:
+            subscribers = list(self._subscribers.get(post_id, ()))
+            if subscribers:
+                self._last_seen[post_id] = state
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, state)
+
+    def subscriber_count(self, post_id: int) -> int:
+        with self._lock:
+            return len(self._subscribers.get(post_id, ()))
+
+    @asynccontextmanager
+    async def subscribe(self, post_id: int, current: Optional[Dict[str, Any]] = None):
+        loop = asyncio.get_running_loop()
+        entry = (loop, asyncio.Queue())
+        with self._lock:
+            self._subscribers.setdefault(post_id, set()).add(entry)
+            if current is not None:
+                self._last_seen.setdefault(post_id, current)
+            if post_id not in self._pollers:
+                self._pollers[post_id] = loop.create_task(self._poll(post_id))
+        try:
+            yield entry[1]
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(post_id)
+                subscribers.discard(entry)
+                if not subscribers:
+                    self._subscribers.pop(post_id, None)
+                    self._last_seen.pop(post_id, None)
+                    poller = self._pollers.pop(post_id, None)
+                    if poller:
+                        poller.cancel()
+
+    async def _poll(self, post_id: int):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if self.registry.local_state(post_id) is not None:
+                continue
+            state = await asyncio.to_thread(self._load, post_id)
+            if state is None:
+                continue
+            with self._lock:
+                last = self._last_seen.get(post_id)
+            if last is None or any(last.get(k) != state[k] for k in state):
+                self.publish(post_id, state)
+
+    def _load(self, post_id: int) -> Optional[Dict[str, Any]]:
+        db = self.registry._session()
+        try:
+            return load_state(db, post_id)
+        finally:
+            db.close()
+
+progress_registry = ProgressRegistry()
+progress_broker = ProgressBroker(progress_registry)
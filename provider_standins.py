@@ -0,0 +1,420 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+from google.genai import types
+
+def _dump(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    if isinstance(value, (list, tuple)):
+        return [_dump(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _dump(v) for k, v in value.items()}
+    return value
+
+def request_key(provider: str, method: str, **request: Any) -> str:
+    request = _dump(request)
+    if isinstance(request.get("config"), dict):
+        request["config"].pop("http_options", None)
+    payload = json.dumps({"provider": provider, "method": method, **request}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class Recordings:
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["key"]] = entry["response"]
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                raise KeyError(f"No recorded response for request {key[:12]} in {self.path}")
+            return self._entries[key]
+
+    def put(self, key: str, response: Any):
+        with self._lock:
+            self._entries[key] = response
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "response": response}) + "\n")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+def _response(value: Dict[str, Any]) -> types.GenerateContentResponse:
+    return types.GenerateContentResponse.model_validate(value)
+
+class _Namespace:
+    def __init__(self, **attrs):
+        self.__dict__.update(attrs)
+
+class RecordingGemini:
+    def __init__(self, inner, recordings: Recordings):
+        self.inner = inner
+        self.recordings = recordings
+        self.models = _Namespace(
+            generate_content=self._generate_content,
+            generate_content_stream=self._generate_content_stream,
+            embed_content=self._embed_content,
+        )
+        self.aio = _Namespace(models=_Namespace(
+            generate_content=self._agenerate_content,
+            generate_content_stream=self._agenerate_content_stream,
+            embed_content=self._aembed_content,
+        ))
+
+    def _generate_content(self, model, contents, config=None):
+        response = self.inner.models.generate_content(model=model, contents=contents, config=config)
+        self.recordings.put(request_key("gemini", "generate", model=model, contents=contents, config=config), _dump(response))
+        return response
+
+    def _embed_content(self, model, contents, config=None):
+        response = self.inner.models.embed_content(model=model, contents=contents, config=config)
+        self.recordings.put(request_key("gemini", "embed", model=model, contents=contents, config=config), _dump(response))
+        return response
+
+    async def _aembed_content(self, model, contents, config=None):
+        response = await self.inner.aio.models.embed_content(model=model, contents=contents, config=config)
+        self.recordings.put(request_key("gemini", "embed", model=model, contents=contents, config=config), _dump(response))
+        return response
+
+    def _generate_content_stream(self, model, contents, config=None):
+        chunks = []
+        for chunk in self.inner.models.generate_content_stream(model=model, contents=contents, config=config):
+            chunks.append(_dump(chunk))
+            yield chunk
+        self.recordings.put(request_key("gemini", "stream", model=model, contents=contents, config=config), chunks)
+
+    async def _agenerate_content(self, model, contents, config=None):
+        response = await self.inner.aio.models.generate_content(model=model, contents=contents, config=config)
+        self.recordings.put(request_key("gemini", "generate", model=model, contents=contents, config=config), _dump(response))
+        return response
+
+    async def _agenerate_content_stream(self, model, contents, config=None):
+        stream = await self.inner.aio.models.generate_content_stream(model=model, contents=contents, config=config)
+        key = request_key("gemini", "stream", model=model, contents=contents, config=config)
+
+        async def chunks():
+            recorded = []
+            async for chunk in stream:
+                recorded.append(_dump(chunk))
+                yield chunk
+            self.recordings.put(key, recorded)
+        return chunks()
+
+class ReplayGemini:
+    def __init__(self, recordings: Recordings, latency: float = 0.0):
+        self.recordings = recordings
+        self.latency = latency
+        self.models = _Namespace(
+            generate_content=self._generate_content,
+            generate_content_stream=self._generate_content_stream,
+            embed_content=self._embed_content,
+        )
+        self.aio = _Namespace(models=_Namespace(
+            generate_content=self._agenerate_content,
+            generate_content_stream=self._agenerate_content_stream,
+            embed_content=self._aembed_content,
+        ))
+
+    def _generate_content(self, model, contents, config=None):
+        time.sleep(self.latency)
+        return _response(self.recordings.get(request_key("gemini", "generate", model=model, contents=contents, config=config)))
+
+    def _embed_content(self, model, contents, config=None):
+        time.sleep(self.latency)
+        return types.EmbedContentResponse.model_validate(
+            self.recordings.get(request_key("gemini", "embed", model=model, contents=contents, config=config))
+        )
+
+    async def _aembed_content(self, model, contents, config=None):
+        await asyncio.sleep(self.latency)
+        return types.EmbedContentResponse.model_validate(
+            self.recordings.get(request_key("gemini", "embed", model=model, contents=contents, config=config))
+        )
+
+    def _generate_content_stream(self, model, contents, config=None):
+        chunks = self.recordings.get(request_key("gemini", "stream", model=model, contents=contents, config=config))
+        time.sleep(self.latency)
+        for chunk in chunks:
+            yield _response(chunk)
+
+    async def _agenerate_content(self, model, contents, config=None):
+        await asyncio.sleep(self.latency)
+        return _response(self.recordings.get(request_key("gemini", "generate", model=model, contents=contents, config=config)))
+
+    async def _agenerate_content_stream(self, model, contents, config=None):
+        chunks = self.recordings.get(request_key("gemini", "stream", model=model, contents=contents, config=config))
+
+        async def replay():
+            await asyncio.sleep(self.latency)
+            for chunk in chunks:
+                yield _response(chunk)
+        return replay()
+
+class SyntheticGemini:
+    def __init__(
+        self,
+        latency: float = 0.05,
+        tool_rounds: int = 1,
+        searches_per_round: int = 3,
+        claims: int = 5,
+        chunk_chars: int = 200,
+    ):
+        self.latency = latency
+        self.tool_rounds = tool_rounds
+        self.searches_per_round = searches_per_round
+        self.claims = claims
+        self.chunk_chars = chunk_chars
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.models = _Namespace(
+            generate_content=self._generate_content,
+            generate_content_stream=self._generate_content_stream,
+            embed_content=self._embed_content,
+        )
+        self.aio = _Namespace(models=_Namespace(
+            generate_content=self._agenerate_content,
+            generate_content_stream=self._agenerate_content_stream,
+            embed_content=self._aembed_content,
+        ))
+
+    @staticmethod
+    def _text(response_text: str, prompt_chars: int) -> types.GenerateContentResponse:
+        return types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.Content(role="model", parts=[types.Part.from_text(text=response_text)]))],
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_chars // 4,
+                candidates_token_count=len(response_text) // 4,
+                total_token_count=prompt_chars // 4 + len(response_text) // 4,
+            ),
+        )
+
+    def _deep_result(self, title: str) -> Dict[str, Any]:
+        return {
+            "credibility_score": 70,
+            "bias": "Center",
+            "sentiment": "Neutral",
+            "risk_type": "None",
+            "red_flags": ["Single unnamed source"],
+            "claims": [
+                {
+                    "text": f"{title}: synthetic claim {i}",
+                    "credibility_score": 60 + i,
+                    "confidence": "Medium",
+                    "reason": "Consistent with the synthetic search results.",
+                    "sources": [f"https://example.com/source/{i}"],
+                    "fact_check_sites": [f"https://factcheck.example.org/{i}"],
+                    "historical_context": "None.",
+                }
+                for i in range(self.claims)
+            ],
+            "trust_signals": ["Named author"],
+            "alternative_headlines": {"neutral": title, "sensational": title.upper(), "calm": title},
+            "latitude": 0.0,
+            "longitude": 0.0,
+        }
+
+    def respond(self, model: str, contents, config: Optional[types.GenerateContentConfig]) -> types.GenerateContentResponse:
+        with self._lock:
+            self.calls += 1
+        history = contents if isinstance(contents, list) else [contents]
+        texts = [part.text for content in history for part in (content.parts or []) if part.text]
+        prompt_chars = sum(len(t) for t in texts)
+        payloads = []
+        for text in texts:
+            try:
+                payloads.append(json.loads(text))
+            except json.JSONDecodeError:
+                continue
+        payload = payloads[0] if payloads else {}
+
+        schema = config.response_schema if config else None
+        if isinstance(schema, dict) and schema.get("type") == "array":
+            return self._text(json.dumps([
+                {"id": item.get("id"), "short_title": item.get("title", "")[:40], "summary_easy": "Synthetic summary.",
+                 "tags": ["synthetic", "news"], "risk_level": "medium", "claim_count": self.claims}
+                for item in payload if isinstance(item, dict)
+            ]), prompt_chars)
+        if isinstance(schema, dict) and "summary" in schema.get("properties", {}):
+            return self._text(json.dumps({
+                "summary": f"Synthetic summary of section {payload.get('section', '')}.",
+                "claims": [f"Section {payload.get('section', '')} claim {i}" for i in range(2)],
+            }), prompt_chars)
+
+        tools_enabled = bool(config and config.tools) and not (
+            config.tool_config and config.tool_config.function_calling_config
+            and config.tool_config.function_calling_config.mode == types.FunctionCallingConfigMode.NONE
+        )
+        if config and config.tools:
+            rounds_done = sum(1 for content in history if content.role == "tool")
+            title = (payload.get("article") or {}).get("title", "") if isinstance(payload, dict) else ""
+            if tools_enabled and rounds_done < self.tool_rounds:
+                return types.GenerateContentResponse(candidates=[types.Candidate(content=types.Content(
+                    role="model",
+                    parts=[
+                        types.Part.from_function_call(name="web_search", args={"query": f"{title} {rounds_done}-{i}"})
+                        for i in range(self.searches_per_round)
+                    ],
+                ))])
+            return self._text(json.dumps(self._deep_result(title)), prompt_chars)
+
+        if config and config.response_mime_type == "application/json":
+            return self._text(json.dumps({
+                "short_title": "Synthetic short title",
+                "summary_easy": "Synthetic summary.",
+                "tags": ["synthetic", "news"],
+                "risk_level": "medium",
+                "claim_count": self.claims,
+            }), prompt_chars)
+        return self._text("Synthetic rewritten article body.", prompt_chars)
+
+    def _chunks(self, response: types.GenerateContentResponse) -> List[types.GenerateContentResponse]:
+        parts = response.candidates[0].content.parts
+        if not parts[0].text:
+            return [response]
+        text = parts[0].text
+        pieces = [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+        chunks = [self._text(piece, 0) for piece in pieces]
+        for chunk in chunks:
+            chunk.usage_metadata = None
+        chunks[-1].usage_metadata = response.usage_metadata
+        return chunks
+
+    def _generate_content(self, model, contents, config=None):
+        time.sleep(self.latency)
+        return self.respond(model, contents, config)
+
+    @staticmethod
+    def _embedding(contents, dim: int = 768) -> types.EmbedContentResponse:
+        values = [0.0] * dim
+        for word in str(contents).lower().split():
+            values[int(hashlib.md5(word.encode()).hexdigest(), 16) % dim] += 1.0
+        return types.EmbedContentResponse(embeddings=[types.ContentEmbedding(values=values)])
+
+    def _embed_content(self, model, contents, config=None):
+        time.sleep(self.latency)
+        return self._embedding(contents)
+
+    async def _aembed_content(self, model, contents, config=None):
+        await asyncio.sleep(self.latency)
+        return self._embedding(contents)
+
+    def _generate_content_stream(self, model, contents, config=None) -> Iterator[types.GenerateContentResponse]:
+        time.sleep(self.latency)
+        yield from self._chunks(self.respond(model, contents, config))
+
+    async def _agenerate_content(self, model, contents, config=None):
+        await asyncio.sleep(self.latency)
+        return self.respond(model, contents, config)
+
+    async def _agenerate_content_stream(self, model, contents, config=None):
+        async def stream():
+            await asyncio.sleep(self.latency)
+            for chunk in self._chunks(self.respond(model, contents, config)):
+                yield chunk
+        return stream()
+
+def synthetic_search_results(query: str, max_results: int) -> Dict[str, Any]:
+    return {
+        "query": query,
+        "results": [
+            {
+                "title": f"Result {i} for {query}",
+                "url": f"https://example.com/search/{hashlib.md5(query.encode()).hexdigest()[:8]}/{i}",
+                "content": f"Synthetic content about {query}.",
+                "score": 1 - i / 10,
+            }
+            for i in range(max_results)
+        ],
+    }
+
+class SyntheticTavily:
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+
+    def search(self, query: str, max_results: int = 5, **kwargs) -> Dict[str, Any]:
+        time.sleep(self.latency)
+        return synthetic_search_results(query, max_results)
+
+class AsyncSyntheticTavily(SyntheticTavily):
+    async def search(self, query: str, max_results: int = 5, **kwargs) -> Dict[str, Any]:
+        await asyncio.sleep(self.latency)
+        return synthetic_search_results(query, max_results)
+
+class RecordingTavily:
+    def __init__(self, inner, recordings: Recordings):
+        self.inner = inner
+        self.recordings = recordings
+
+    def search(self, query: str, max_results: int = 5, **kwargs) -> Dict[str, Any]:
+        response = self.inner.search(query=query, max_results=max_results, **kwargs)
+        self.recordings.put(request_key("tavily", "search", query=query, max_results=max_results), response)
+        return response
+
+class AsyncRecordingTavily(RecordingTavily):
+    async def search(self, query: str, max_results: int = 5, **kwargs) -> Dict[str, Any]:
+        response = await self.inner.search(query=query, max_results=max_results, **kwargs)
+        self.recordings.put(request_key("tavily", "search", query=query, max_results=max_results), response)
+        return response
+
+class ReplayTavily:
+    def __init__(self, recordings: Recordings, latency: float = 0.0):
+        self.recordings = recordings
+        self.latency = latency
+
+    def search(self, query: str, max_results: int = 5, **kwargs) -> Dict[str, Any]:
+        time.sleep(self.latency)
+        return self.recordings.get(request_key("tavily", "search", query=query, max_results=max_results))
+
+class AsyncReplayTavily(ReplayTavily):
+    async def search(self, query: str, max_results: int = 5, **kwargs) -> Dict[str, Any]:
+        await asyncio.sleep(self.latency)
+        return self.recordings.get(request_key("tavily", "search", query=query, max_results=max_results))
+
+class SyntheticNewsApi:
+    def __init__(self, latency: float = 0.05, articles: int = 10):
+        self.latency = latency
+        self.articles = articles
+
+    def get_top_headlines(self, country: str = "us", page_size: int = 10, **kwargs) -> Dict[str, Any]:
+        time.sleep(self.latency)
+        return {
+            "status": "ok",
+            "articles": [
+                {
+                    "title": f"Synthetic {country} headline {i}",
+                    "description": f"Synthetic description of headline {i}.",
+                    "url": f"https://news.example.com/{country}/{i}",
+                }
+                for i in range(min(page_size, self.articles))
+            ],
+        }
+
+class RecordingNewsApi:
+    def __init__(self, inner, recordings: Recordings):
+        self.inner = inner
+        self.recordings = recordings
+
+    def get_top_headlines(self, country: str = "us", page_size: int = 10, **kwargs) -> Dict[str, Any]:
+        response = self.inner.get_top_headlines(country=country, page_size=page_size, **kwargs)
+        self.recordings.put(request_key("newsapi", "top_headlines", country=country, page_size=page_size), response)
+        return response
+
+class ReplayNewsApi:
+    def __init__(self, recordings: Recordings, latency: float = 0.0):
+        self.recordings = recordings
+        self.latency = latency
+
+    def get_top_headlines(self, country: str = "us", page_size: int = 10, **kwargs) -> Dict[str, Any]:
+        time.sleep(self.latency)
+        return self.recordings.get(request_key("newsapi", "top_headlines", country=country, page_size=page_size))
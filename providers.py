@@ -0,0 +1,239 @@
+import asyncio
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from google import genai
+from newsapi import NewsApiClient
+from tavily import TavilyClient, AsyncTavilyClient
+import provider_standins as standins
+import config
+
+PROVIDER_MODES = ("live", "record", "replay", "synthetic")
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+class ProviderLimiter:
+    def __init__(self, name: str, rate: float, burst: float, max_concurrency: int):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.max_concurrency = max(1, max_concurrency)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._async_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.queued = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _started(self, waited: float):
+        with self._lock:
+            self.calls += 1
+            if waited > 0.001:
+                self.queued += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _finished(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    @contextmanager
+    def slot(self):
+        started = time.monotonic()
+        delay = self.bucket.reserve()
+        if delay:
+            time.sleep(delay)
+        self._slots.acquire()
+        self._started(time.monotonic() - started)
+        try:
+            yield
+        finally:
+            self._finished()
+            self._slots.release()
+
+    def _loop_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            slots = self._async_slots.get(loop)
+            if slots is None:
+                slots = self._async_slots[loop] = asyncio.Semaphore(self.max_concurrency)
+            return slots
+
+    @asynccontextmanager
+    async def aslot(self):
+        started = time.monotonic()
+        delay = self.bucket.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+        slots = self._loop_slots()
+        async with slots:
+            self._started(time.monotonic() - started)
+            try:
+                yield
+            finally:
+                self._finished()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "queued": self.queued,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "max_concurrency": self.max_concurrency,
+                "avg_wait_seconds": self.wait_seconds / self.calls if self.calls else 0.0,
+                "max_wait_seconds": self.max_wait_seconds,
+            }
+
+class ProviderPool:
+    def __init__(self):
+        self.limiters = {
+            "gemini": ProviderLimiter(
+                "gemini", config.GEMINI_RATE_PER_SECOND, config.GEMINI_BURST, config.GEMINI_MAX_CONCURRENCY
+            ),
+            "tavily": ProviderLimiter(
+                "tavily", config.TAVILY_RATE_PER_SECOND, config.TAVILY_BURST, config.TAVILY_MAX_CONCURRENCY
+            ),
+        }
+        if config.PROVIDER_MODE not in PROVIDER_MODES:
+            raise ValueError(f"PROVIDER_MODE must be one of {', '.join(PROVIDER_MODES)}")
+        self.mode = config.PROVIDER_MODE
+        self.latency = config.SYNTHETIC_LATENCY_MS / 1000
+        self._recordings: Optional[standins.Recordings] = None
+        self._lock = threading.Lock()
+        self._gemini: Optional[genai.Client] = None
+        self._tavily: Optional[TavilyClient] = None
+        self._newsapi: Optional[NewsApiClient] = None
+        self._async_gemini: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, genai.Client]" = weakref.WeakKeyDictionary()
+        self._async_tavily: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncTavilyClient]" = weakref.WeakKeyDictionary()
+
+    def configure(self, mode: str, recordings_path: Optional[str] = None, latency: Optional[float] = None):
+        if mode not in PROVIDER_MODES:
+            raise ValueError(f"PROVIDER_MODE must be one of {', '.join(PROVIDER_MODES)}")
+        with self._lock:
+            self.mode = mode
+            if latency is not None:
+                self.latency = latency
+            self._recordings = standins.Recordings(recordings_path) if recordings_path else None
+            self._gemini = None
+            self._tavily = None
+            self._newsapi = None
+            self._async_gemini.clear()
+            self._async_tavily.clear()
+
+    def recordings(self) -> standins.Recordings:
+        if self._recordings is None:
+            self._recordings = standins.Recordings(config.PROVIDER_RECORDINGS_PATH)
+        return self._recordings
+
+    def _gemini_client(self):
+        if self.mode == "synthetic":
+            return standins.SyntheticGemini(
+                latency=self.latency,
+                tool_rounds=config.SYNTHETIC_TOOL_ROUNDS,
+                searches_per_round=config.SYNTHETIC_SEARCHES_PER_ROUND,
+                claims=config.SYNTHETIC_CLAIMS,
+            )
+        if self.mode == "replay":
+            return standins.ReplayGemini(self.recordings(), self.latency)
+        client = genai.Client(api_key=config.GOOGLE_API_KEY)
+        if self.mode == "record":
+            return standins.RecordingGemini(client, self.recordings())
+        return client
+
+    def gemini(self) -> genai.Client:
+        with self._lock:
+            if self._gemini is None:
+                self._gemini = self._gemini_client()
+            return self._gemini
+
+    def tavily(self) -> TavilyClient:
+        with self._lock:
+            if self._tavily is None:
+                if self.mode == "synthetic":
+                    self._tavily = standins.SyntheticTavily(self.latency)
+                elif self.mode == "replay":
+                    self._tavily = standins.ReplayTavily(self.recordings(), self.latency)
+                else:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_maxsize=self.limiters["tavily"].max_concurrency)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._tavily = TavilyClient(api_key=config.TAVILY_API_KEY, session=session)
+                    if self.mode == "record":
+                        self._tavily = standins.RecordingTavily(self._tavily, self.recordings())
+            return self._tavily
+
+    def newsapi(self) -> NewsApiClient:
+        with self._lock:
+            if self._newsapi is None:
+                if self.mode == "synthetic":
+                    self._newsapi = standins.SyntheticNewsApi(self.latency)
+                elif self.mode == "replay":
+                    self._newsapi = standins.ReplayNewsApi(self.recordings(), self.latency)
+                else:
+                    self._newsapi = NewsApiClient(api_key=config.NEWS_API_KEY)
+                    if self.mode == "record":
+                        self._newsapi = standins.RecordingNewsApi(self._newsapi, self.recordings())
+            return self._newsapi
+
+    def async_gemini(self) -> genai.Client:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_gemini.get(loop)
+            if client is None:
+                client = self._async_gemini[loop] = self._gemini_client()
+            return client
+
+    def async_tavily(self) -> AsyncTavilyClient:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_tavily.get(loop)
+            if client is None:
+                if self.mode == "synthetic":
+                    client = standins.AsyncSyntheticTavily(self.latency)
+                elif self.mode == "replay":
+                    client = standins.AsyncReplayTavily(self.recordings(), self.latency)
+                else:
+                    client = AsyncTavilyClient(api_key=config.TAVILY_API_KEY)
+                    if self.mode == "record":
+                        client = standins.AsyncRecordingTavily(client, self.recordings())
+                self._async_tavily[loop] = client
+            return client
+
+    def limit(self, provider: str):
+        return self.limiters[provider].slot()
+
+    def alimit(self, provider: str):
+        return self.limiters[provider].aslot()
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: limiter.stats() for name, limiter in self.limiters.items()}
+
+provider_pool = ProviderPool()
@@ -0,0 +1,43 @@
+from typing import Iterable, List
+from sqlalchemy.orm import Session, joinedload, load_only, selectinload
+from models.post_model import Post, Claim, AnalysisStatus
+
+POST_PROFILES = {
+    "ref": lambda: (
+        load_only(Post.id, Post.title, Post.created_at),
+    ),
+    "summary": lambda: (
+        load_only(
+            Post.id, Post.title, Post.created_at, Post.analysis_status,
+            Post.short_title, Post.summary_easy, Post.credibility_score,
+            Post.bias, Post.sentiment, Post.risk_type, Post.latitude, Post.longitude,
+        ),
+        selectinload(Post.tags),
+    ),
+    "full": lambda: (
+        joinedload(Post.owner),
+        selectinload(Post.tags),
+        selectinload(Post.red_flags),
+        selectinload(Post.trust_signals),
+        selectinload(Post.claims).selectinload(Claim.sources),
+        selectinload(Post.claims).selectinload(Claim.fact_check_sites),
+    ),
+}
+
+def post_options(profile: str = "full"):
+    return POST_PROFILES[profile]()
+
+def load_posts(db: Session, post_ids: Iterable[int], profile: str = "full", completed_only: bool = True) -> List[Post]:
+    post_ids = list(dict.fromkeys(post_ids))
+    if not post_ids:
+        return []
+    query = (
+        db.query(Post)
+        .options(*post_options(profile))
+        .filter(Post.id.in_(post_ids))
+        .execution_options(populate_existing=True)
+    )
+    if completed_only:
+        query = query.filter(Post.analysis_status == AnalysisStatus.COMPLETED)
+    by_id = {post.id: post for post in query}
+    return [by_id[post_id] for post_id in post_ids if post_id in by_id]
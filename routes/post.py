@@ -1,40 +1,179 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Union
 from database import get_db
 from models.user import User
-from models.post_model import Post, AnalysisStatus, Upvote, Downvote, View
+from models.post_model import Post, PostFingerprint, PostTag, AnalysisStats, AnalysisStatus, Upvote, Downvote, View
 import schemas
 from auth_deps import get_current_user, get_current_editor
 import config
 from datetime import datetime, timedelta
-from sqlalchemy import func, desc, asc
-import agent
+import asyncio
+import base64
+import json
+from sqlalchemy import func, desc, asc, insert, select, tuple_
+import counters
+import dedup
+from feed_snapshot import breaking_news_snapshot
+from view_buffer import view_buffer
+from similarity import find_similar_posts
+from embeddings import embedding_index
+from query_options import post_options, load_posts
+import job_queue
+from progress import progress_registry, progress_broker, load_state, TERMINAL_STATUSES
 
 router = APIRouter(prefix="/posts", tags=["Posts"])
 
+FEED_VIEWS = {"full": schemas.PostOut, "summary": schemas.PostSummary}
+
 @router.post("/", response_model=schemas.PostOut)
 def create_post(
     post: schemas.PostCreate,
-    background_tasks: BackgroundTasks,
+    force_analysis: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_editor)
 ):
     db_post = Post(
         **post.dict(),
         created_by=current_user.id,
-        analysis_status=AnalysisStatus.PROCESSING,
+        analysis_status=AnalysisStatus.PENDING,
         analysis_progress=0.0,
-        status_message="Analysis pending"
+        status_message="Analysis queued"
     )
     db.add(db_post)
+    db.flush()
+    db.add(dedup.build_fingerprint(db_post))
+    job_queue.enqueue(db, db_post.id, payload={"force": force_analysis}, commit=False)
     db.commit()
     db.refresh(db_post)
 
-    background_tasks.add_task(analyze_and_update_post, db_post.id)
-
     return db_post
 
+@router.post("/batch", response_model=List[schemas.AnalysisStatusOut])
+def create_posts_batch(
+    batch: schemas.PostBatchCreate,
+    force_analysis: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_editor)
+):
+    if not batch.posts:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(batch.posts) > config.POST_BATCH_MAX_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batch exceeds {config.POST_BATCH_MAX_SIZE} posts")
+
+    post_ids = db.scalars(
+        insert(Post).returning(Post.id, sort_by_parameter_order=True),
+        [
+            {
+                **post.dict(),
+                "created_by": current_user.id,
+                "analysis_status": AnalysisStatus.PENDING,
+                "analysis_progress": 0.0,
+                "status_message": "Analysis queued",
+            }
+            for post in batch.posts
+        ],
+    ).all()
+    db.execute(insert(PostFingerprint), [
+        dedup.fingerprint_values(post_id, post.title, post.body)
+        for post_id, post in zip(post_ids, batch.posts)
+    ])
+
+    for i in range(0, len(post_ids), config.LITE_BATCH_SIZE):
+        chunk = list(post_ids[i:i + config.LITE_BATCH_SIZE])
+        job_queue.enqueue(db, None, kind="lite_batch", payload={"post_ids": chunk, "force": force_analysis}, commit=False)
+    db.commit()
+
+    return [
+        {
+            "post_id": post_id,
+            "analysis_status": AnalysisStatus.PENDING,
+            "analysis_progress": 0.0,
+            "status_message": "Analysis queued"
+        }
+        for post_id in post_ids
+    ]
+
+def _encode_cursor(post: Post) -> str:
+    payload = json.dumps({"c": post.created_at.isoformat(), "i": post.id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(payload["c"]), int(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@router.get("/", response_model=schemas.PostPage)
+def list_posts(
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    analysis_status: AnalysisStatus = AnalysisStatus.COMPLETED,
+    min_credibility: Optional[int] = Query(None, ge=0, le=100),
+    max_credibility: Optional[int] = Query(None, ge=0, le=100),
+    risk_type: Optional[str] = None,
+    tag: Optional[str] = None,
+    view: str = Query("summary", pattern="^(full|summary)$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    query = (
+        db.query(Post)
+        .options(*post_options(view))
+        .filter(Post.analysis_status == analysis_status)
+    )
+    if min_credibility is not None:
+        query = query.filter(Post.credibility_score >= min_credibility)
+    if max_credibility is not None:
+        query = query.filter(Post.credibility_score <= max_credibility)
+    if risk_type:
+        query = query.filter(Post.risk_type == risk_type)
+    if tag:
+        query = query.filter(
+            select(PostTag.id).where(PostTag.post_id == Post.id, PostTag.tag == tag.strip().lower()).exists()
+        )
+    if cursor:
+        created_at, post_id = _decode_cursor(cursor)
+        cursor_created_at = func.coalesce(
+            select(Post.created_at).where(Post.id == post_id).scalar_subquery(),
+            created_at,
+        )
+        query = query.filter(tuple_(Post.created_at, Post.id) < tuple_(cursor_created_at, post_id))
+
+    posts = query.order_by(Post.created_at.desc(), Post.id.desc()).limit(limit + 1).all()
+    next_cursor = _encode_cursor(posts[limit - 1]) if len(posts) > limit else None
+    posts = posts[:limit]
+
+    post_ids = [p.id for p in posts]
+    upvoted_ids, downvoted_ids = counters.user_votes(db, current_user.id, post_ids)
+    post_counts = counters.counts_for(db, post_ids)
+    items = []
+    for post in posts:
+        uv, dv, vc = post_counts.get(post.id, (0, 0, 0))
+        items.append(FEED_VIEWS[view].from_orm(post).copy(update={
+            "is_upvoted": post.id in upvoted_ids,
+            "is_downvoted": post.id in downvoted_ids,
+            "upvote_downvote_count": uv - dv,
+            "view_count": vc,
+        }))
+
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/triage-report", response_model=List[schemas.AnalysisStatsOut])
+def get_triage_report(
+    route: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_editor)
+):
+    query = db.query(AnalysisStats)
+    if route:
+        query = query.filter(AnalysisStats.route == route)
+    return query.order_by(AnalysisStats.completed_at.desc()).limit(limit).all()
+
 @router.delete("/{post_id}")
 def delete_post(
     post_id: int,
@@ -45,40 +184,48 @@ def delete_post(
     post = db_session.query(Post).filter(Post.id == post_id).first()
     db_session.delete(post)
     db_session.commit()
+    breaking_news_snapshot.invalidate()
+    embedding_index.forget(post_id)
 
     return {"message": "done"}
 
-def analyze_and_update_post(post_id: int):
-    try:
-        db_session = next(get_db())
-        
-        engine = agent.NewsCredibilityEngine(
-            tavily_key=config.TAVILY_API_KEY,
-            db=db_session,
-            post_id=post_id
-        )
-        
-        post = db_session.query(Post).filter(Post.id == post_id).first()
-        if post:
-            news_article = agent.NewsArticle(title=post.title, body=post.body)
-            engine.analyze(news_article)
-        
-    except Exception as e:
-        db_session = next(get_db())
-        post = db_session.query(Post).filter(Post.id == post_id).first()
-        if post:
-            post.analysis_status = AnalysisStatus.FAILED
-            post.status_message = f"Analysis failed: {str(e)}"
-            db_session.commit()
-    finally:
-        db_session.close()
+@router.post("/{post_id}/reanalyze", response_model=schemas.AnalysisStatusOut)
+def reanalyze_post(
+    post_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_editor)
+):
+    post = db.query(Post).filter(Post.id == post_id).first()
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    post.analysis_status = AnalysisStatus.PENDING
+    post.analysis_progress = 0.0
+    post.status_message = "Analysis queued"
+    job_queue.enqueue(db, post.id, payload={"force": True}, commit=False)
+    db.commit()
+
+    return {
+        "post_id": post.id,
+        "analysis_status": post.analysis_status,
+        "analysis_progress": post.analysis_progress,
+        "status_message": post.status_message
+    }
 
 @router.get("/{post_id}/status", response_model=schemas.AnalysisStatusOut)
 def get_analysis_status(
     post_id: int,
     db: Session = Depends(get_db)
 ):
-    post = db.query(Post).filter(Post.id == post_id).first()
+    state = progress_registry.local_state(post_id)
+    if state:
+        return state
+
+    post = (
+        db.query(Post.id, Post.analysis_status, Post.analysis_progress, Post.status_message)
+        .filter(Post.id == post_id)
+        .first()
+    )
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
@@ -89,6 +236,54 @@ def get_analysis_status(
         "status_message": post.status_message
     }
 
+@router.get("/{post_id}/analysis-stats", response_model=schemas.AnalysisStatsOut)
+def get_analysis_stats(
+    post_id: int,
+    db: Session = Depends(get_db)
+):
+    stats = db.query(AnalysisStats).filter(AnalysisStats.post_id == post_id).first()
+    if not stats:
+        raise HTTPException(status_code=404, detail="No analysis stats for this post")
+    return stats
+
+@router.get("/{post_id}/status/stream")
+async def stream_analysis_status(post_id: int):
+    state = progress_registry.local_state(post_id)
+    if state is None:
+        state = await run_in_threadpool(_load_progress_state, post_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    return StreamingResponse(
+        _progress_events(post_id, state),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def _load_progress_state(post_id: int):
+    db_session = next(get_db())
+    try:
+        return load_state(db_session, post_id)
+    finally:
+        db_session.close()
+
+def _format_progress_event(state) -> str:
+    payload = schemas.AnalysisStatusOut(**state).model_dump_json()
+    return f"event: progress\ndata: {payload}\n\n"
+
+async def _progress_events(post_id: int, initial_state):
+    async with progress_broker.subscribe(post_id, initial_state) as queue:
+        state = progress_registry.local_state(post_id) or initial_state
+        yield _format_progress_event(state)
+
+        while state["analysis_status"] not in TERMINAL_STATUSES:
+            try:
+                state = await asyncio.wait_for(queue.get(), timeout=config.PROGRESS_STREAM_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield _format_progress_event(state)
+
 @router.post("/{post_id}/upvote", status_code=201)
 def add_upvote(
     post_id: int,
@@ -102,17 +297,20 @@ def add_upvote(
     existing_upvote = db.query(Upvote).filter_by(user_id=current_user.id, post_id=post_id).first()
     if existing_upvote:
         db.delete(existing_upvote)
+        counters.bump(db, post_id, upvotes=-1)
         db.commit()
+        breaking_news_snapshot.invalidate()
         return {"message": "Upvote Neutralised"}
 
     existing_downvote = db.query(Downvote).filter_by(user_id=current_user.id, post_id=post_id).first()
     if existing_downvote:
         db.delete(existing_downvote)
-        db.commit()
 
     db_upvote = Upvote(user_id=current_user.id, post_id=post_id)
     db.add(db_upvote)
+    counters.bump(db, post_id, upvotes=1, downvotes=-1 if existing_downvote else 0)
     db.commit()
+    breaking_news_snapshot.invalidate()
     return {"message": "Upvoted"}
 
 @router.post("/{post_id}/downvote", status_code=201)
@@ -128,17 +326,20 @@ def add_downvote(
     existing_downvote = db.query(Downvote).filter_by(user_id=current_user.id, post_id=post_id).first()
     if existing_downvote:
         db.delete(existing_downvote)
+        counters.bump(db, post_id, downvotes=-1)
         db.commit()
+        breaking_news_snapshot.invalidate()
         return {"message": "Neutralised Downvote"}
 
     existing_upvote = db.query(Upvote).filter_by(user_id=current_user.id, post_id=post_id).first()
     if existing_upvote:
         db.delete(existing_upvote)
-        db.commit()
 
     db_downvote = Downvote(user_id=current_user.id, post_id=post_id)
     db.add(db_downvote)
+    counters.bump(db, post_id, downvotes=1, upvotes=-1 if existing_upvote else 0)
     db.commit()
+    breaking_news_snapshot.invalidate()
     return {"message": "Downvoted"}
 
 @router.post("/{post_id}/view", status_code=201)
@@ -147,74 +348,23 @@ def add_view(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if not post:
+    if not db.query(Post.id).filter(Post.id == post_id).first():
         raise HTTPException(status_code=404, detail="Post not found")
 
-    db_view = View(user_id=current_user.id, post_id=post_id)
-    db.add(db_view)
-    db.commit()
+    view_buffer.record(current_user.id, post_id)
     return {"message": "View recorded"}
 
-@router.get("/breaking-news", response_model=List[schemas.PostOut])
+@router.get("/breaking-news", response_model=List[Union[schemas.PostOut, schemas.PostSummary]])
 def get_breaking_news(
+    view: str = Query("full", pattern="^(full|summary)$"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    posts_query = (
-        db.query(Post)
-        .filter(Post.analysis_status == AnalysisStatus.COMPLETED)
-        .all()
-    )
-
-    if not posts_query:
-        return []
+    return JSONResponse(breaking_news_snapshot.get(db, current_user.id, view))
 
-    upvote_counts = dict(
-        db.query(Upvote.post_id, func.count(Upvote.id))
-        .group_by(Upvote.post_id)
-        .all()
-    )
-    downvote_counts = dict(
-        db.query(Downvote.post_id, func.count(Downvote.id))
-        .group_by(Downvote.post_id)
-        .all()
-    )
-    view_counts = dict(
-        db.query(View.post_id, func.count(View.id))
-        .group_by(View.post_id)
-        .all()
-    )
-
-    ranked_posts = []
-    now = datetime.utcnow()
-
-    for post in posts_query:
-        uv = upvote_counts.get(post.id, 0)
-        dv = downvote_counts.get(post.id, 0)
-        vc = view_counts.get(post.id, 0)
-
-        hours_old = (now - post.created_at.replace(tzinfo=None)).total_seconds() / 3600
-
-        recency_weight = 1 / (1 + hours_old/12)
-
-        score = (uv * 3 + vc * 1 - dv * 2) * recency_weight
-
-        ranked_posts.append((score, uv, vc, -dv, post))
-
-    ranked_posts.sort(key=lambda x: (x[0], x[1], x[2], x[3]), reverse=True)
-
-    top_posts = [schemas.PostOut.from_orm(p[4]).copy(update={
-        "upvote_downvote_count": p[1] - (-p[3]),
-        "view_count": p[2],
-        "is_upvoted": db.query(Upvote).filter_by(user_id=current_user.id, post_id=p[4].id).first() is not None,
-        "is_downvoted": db.query(Downvote).filter_by(user_id=current_user.id, post_id=p[4].id).first() is not None,
-    }) for p in ranked_posts[:5]]
-
-    return top_posts
-
-@router.get("/recommendations", response_model=List[schemas.PostOut])
+@router.get("/recommendations", response_model=List[Union[schemas.PostOut, schemas.PostSummary]])
 def get_recommendations(
+    view: str = Query("full", pattern="^(full|summary)$"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -251,6 +401,7 @@ def get_recommendations(
     if not scores:
         posts = (
             db.query(Post)
+            .options(*post_options(view))
             .filter(Post.analysis_status == AnalysisStatus.COMPLETED)
             .order_by(Post.created_at.desc())
             .limit(10)
@@ -260,67 +411,30 @@ def get_recommendations(
         top_post_ids = sorted(scores.keys(), key=lambda pid: scores[pid], reverse=True)[:5]
         top_posts = (
             db.query(Post)
+            .options(*post_options("ref"))
             .filter(Post.id.in_(top_post_ids), Post.analysis_status == AnalysisStatus.COMPLETED)
             .all()
         )
-        
-        similar_ids = find_similar_posts(db=db, source_posts=top_posts)
-
-        posts = top_posts[:]
-
-        if similar_ids:
-            similar_posts = (
-                db.query(Post)
-                .filter(Post.id.in_(similar_ids), Post.analysis_status == AnalysisStatus.COMPLETED)
-                .all()
-            )
-            posts.extend(similar_posts)
-
-        seen = set()
-        unique_posts = []
-        for p in posts:
-            if p.id not in seen:
-                seen.add(p.id)
-                unique_posts.append(p)
-        posts = unique_posts[:10]
+
+        similar_ids = []
+        if config.RECOMMENDATION_EMBEDDINGS:
+            similar_ids = embedding_index.similar(db, scores, exclude=scores.keys())
+        if not similar_ids:
+            similar_ids = find_similar_posts(db=db, source_posts=top_posts)
+
+        posts = load_posts(db, [p.id for p in top_posts] + list(similar_ids), profile=view)[:10]
 
     post_ids = [p.id for p in posts]
 
-    upvoted_ids = {
-        u.post_id for u in db.query(Upvote)
-        .filter(Upvote.user_id == current_user.id, Upvote.post_id.in_(post_ids)).all()
-    }
-    downvoted_ids = {
-        d.post_id for d in db.query(Downvote)
-        .filter(Downvote.user_id == current_user.id, Downvote.post_id.in_(post_ids)).all()
-    }
+    upvoted_ids, downvoted_ids = counters.user_votes(db, current_user.id, post_ids)
 
-    upvote_counts = dict(
-        db.query(Upvote.post_id, func.count(Upvote.id))
-        .filter(Upvote.post_id.in_(post_ids))
-        .group_by(Upvote.post_id)
-        .all()
-    )
-    downvote_counts = dict(
-        db.query(Downvote.post_id, func.count(Downvote.id))
-        .filter(Downvote.post_id.in_(post_ids))
-        .group_by(Downvote.post_id)
-        .all()
-    )
-    view_counts = dict(
-        db.query(View.post_id, func.count(View.id))
-        .filter(View.post_id.in_(post_ids))
-        .group_by(View.post_id)
-        .all()
-    )
+    post_counts = counters.counts_for(db, post_ids)
 
     result = []
     for post in posts:
-        uv = upvote_counts.get(post.id, 0)
-        dv = downvote_counts.get(post.id, 0)
-        vc = view_counts.get(post.id, 0)
+        uv, dv, vc = post_counts.get(post.id, (0, 0, 0))
         result.append(
-            schemas.PostOut.from_orm(post).copy(update={
+            FEED_VIEWS[view].from_orm(post).copy(update={
                 "is_upvoted": post.id in upvoted_ids,
                 "is_downvoted": post.id in downvoted_ids,
                 "upvote_downvote_count": uv - dv,
@@ -330,61 +444,21 @@ def get_recommendations(
 
     return result
 
-def find_similar_posts(db: Session, source_posts: List[Post]) -> List[int]:
-    if not source_posts:
-        return []
-
-    source_tags = set()
-    source_keywords = set()
-
-    for post in source_posts:
-        if getattr(post, "tags", None):
-            if isinstance(post.tags, list):
-                source_tags.update([str(t).strip().lower() for t in post.tags])
-            else:
-                source_tags.update([str(t).strip().lower() for t in str(post.tags).split(",") if t.strip()])
-
-        if post.title:
-            for word in post.title.lower().split():
-                if len(word) > 2:
-                    source_keywords.add(word)
-
-    query = db.query(Post).filter(Post.analysis_status == AnalysisStatus.COMPLETED)
-
-    similar_posts = []
-    source_ids = {p.id for p in source_posts}
-
-    for candidate in query.all():
-        if candidate.id in source_ids:
-            continue
-
-        score = 0
-
-        if getattr(candidate, "tags", None):
-            candidate_tags = (
-                candidate.tags if isinstance(candidate.tags, list)
-                else [t.strip().lower() for t in str(candidate.tags).split(",") if t.strip()]
-            )
-            overlap = source_tags.intersection(set(candidate_tags))
-            score += len(overlap) * 2
-
-        if candidate.title:
-            candidate_words = set(candidate.title.lower().split())
-            overlap = source_keywords.intersection(candidate_words)
-            score += len(overlap)
-
-        if score > 0:
-            similar_posts.append((candidate.id, score))
-
-    if not similar_posts:
-        posts = (
-            db.query(Post)
-            .filter(~Post.id.in_(source_ids), Post.analysis_status == AnalysisStatus.COMPLETED)
-            .order_by(Post.created_at.desc())
-            .limit(10)
-            .all()
-        )
-        return [p.id for p in posts]
+@router.get("/{post_id}", response_model=schemas.PostOut)
+def get_post(
+    post_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    posts = load_posts(db, [post_id], completed_only=False)
+    if not posts:
+        raise HTTPException(status_code=404, detail="Post not found")
 
-    similar_posts.sort(key=lambda x: x[1], reverse=True)
-    return [pid for pid, _ in similar_posts[:10]]
\ No newline at end of file
+    upvoted_ids, downvoted_ids = counters.user_votes(db, current_user.id, [post_id])
+    uv, dv, vc = counters.counts_for(db, [post_id]).get(post_id, (0, 0, 0))
+    return schemas.PostOut.from_orm(posts[0]).copy(update={
+        "is_upvoted": post_id in upvoted_ids,
+        "is_downvoted": post_id in downvoted_ids,
+        "upvote_downvote_count": uv - dv,
+        "view_count": vc,
+    })
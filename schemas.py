@@ -1,4 +1,4 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Union
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
 from models.post_model import AnalysisStatus
@@ -44,10 +44,30 @@ class AnalysisStatusOut(BaseModel):
     analysis_status: AnalysisStatus
     analysis_progress: float
     status_message: str
+    partial_result: Optional[Dict[str, Any]] = None
     
     class Config:
         from_attributes = True
 
+class AnalysisStatsOut(BaseModel):
+    post_id: int
+    elapsed_seconds: float
+    model_calls: int
+    tool_rounds: int
+    searches: int
+    prompt_tokens: int
+    output_tokens: int
+    total_tokens: int
+    budget_exhausted: Optional[str]
+    route: Optional[str]
+    risk_level: Optional[str]
+    claim_count: Optional[int]
+    route_reason: Optional[str]
+    completed_at: datetime
+
+    class Config:
+        from_attributes = True
+
 class UserBase(BaseModel):
     email: EmailStr
 
@@ -81,6 +101,9 @@ class PostBase(BaseModel):
 class PostCreate(PostBase):
     pass
 
+class PostBatchCreate(BaseModel):
+    posts: List[PostCreate]
+
 class PostOut(PostBase):
     id: int
     created_at: datetime
@@ -118,6 +141,37 @@ class PostOut(PostBase):
     class Config:
         from_attributes = True
 
+class PostSummary(BaseModel):
+    id: int
+    title: str
+    created_at: datetime
+
+    analysis_status: AnalysisStatus
+    short_title: Optional[str]
+    summary_easy: Optional[str]
+    credibility_score: Optional[int]
+    bias: Optional[str]
+    sentiment: Optional[str]
+    risk_type: Optional[str]
+
+    tags: List[PostTag]
+
+    latitude: Optional[float]
+    longitude: Optional[float]
+
+    is_upvoted: bool = False
+    is_downvoted: bool = False
+
+    upvote_downvote_count: int = 0
+    view_count: int = 0
+
+    class Config:
+        from_attributes = True
+
+class PostPage(BaseModel):
+    items: List[Union[PostOut, PostSummary]]
+    next_cursor: Optional[str] = None
+
 class GameQuery(BaseModel):
     country: Optional[str]
 
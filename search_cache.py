@@ -0,0 +1,224 @@
+import asyncio
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from models.search_cache_model import SearchCacheEntry
+import config
+
+Results = List[Dict[str, Any]]
+
+def normalize_query(query: str) -> str:
+    q = unicodedata.normalize("NFKC", query or "").lower()
+    q = re.sub(r"[\"'“”‘’`]", "", q)
+    q = re.sub(r"[^\w\s%$.\-]", " ", q)
+    q = re.sub(r"(?<!\d)[.\-]|[.\-](?!\d)", " ", q)
+    return " ".join(q.split())
+
+class DatabaseSearchStore:
+    PURGE_EVERY = 500
+
+    def __init__(self, session_factory: Optional[Callable] = None):
+        self._session_factory = session_factory
+        self._puts = 0
+
+    def _session(self):
+        if self._session_factory is None:
+            from database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def get(self, key: str) -> Optional[Tuple[float, int, Results]]:
+        db = self._session()
+        try:
+            entry = db.query(SearchCacheEntry).filter(SearchCacheEntry.key == key).first()
+            if not entry:
+                return None
+            expires_at = entry.expires_at
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            ttl_left = (expires_at - datetime.now(timezone.utc)).total_seconds()
+            if ttl_left <= 0:
+                return None
+            return ttl_left, entry.max_results, entry.results
+        finally:
+            db.close()
+
+    def put(self, key: str, max_results: int, results: Results, ttl_seconds: float):
+        db = self._session()
+        try:
+            now = datetime.now(timezone.utc)
+            db.merge(SearchCacheEntry(
+                key=key,
+                max_results=max_results,
+                results=results,
+                created_at=now,
+                expires_at=now + timedelta(seconds=ttl_seconds),
+            ))
+            self._puts += 1
+            if self._puts % self.PURGE_EVERY == 0:
+                db.query(SearchCacheEntry).filter(SearchCacheEntry.expires_at <= now).delete()
+            db.commit()
+        except Exception:
+            db.rollback()
+        finally:
+            db.close()
+
+class SearchCache:
+    def __init__(
+        self,
+        ttl_seconds: float = config.SEARCH_CACHE_TTL_SECONDS,
+        max_entries: int = config.SEARCH_CACHE_MAX_ENTRIES,
+        store: Optional[DatabaseSearchStore] = None,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.store = store
+        self._entries: "OrderedDict[str, Tuple[float, int, Results]]" = OrderedDict()
+        self._in_flight: Dict[str, threading.Event] = {}
+        self._async_in_flight: Dict[str, asyncio.Event] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.store_hits = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _usable(entry: Tuple[float, int, Results], max_results: int) -> bool:
+        _, cached_k, results = entry
+        return cached_k >= max_results or len(results) < cached_k
+
+    def _get_local(self, key: str, max_results: int) -> Optional[Results]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        if not self._usable(entry, max_results):
+            return None
+        self._entries.move_to_end(key)
+        return entry[2][:max_results]
+
+    def _put_local(self, key: str, max_results: int, results: Results, ttl_seconds: float):
+        self._entries[key] = (time.monotonic() + ttl_seconds, max_results, results)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, query: str, max_results: int = 5) -> Optional[Results]:
+        key = normalize_query(query)
+        with self._lock:
+            results = self._get_local(key, max_results)
+        if results is not None:
+            return results
+
+        if self.store is not None:
+            stored = self.store.get(key)
+            if stored is not None and self._usable(stored, max_results):
+                ttl_left, cached_k, results = stored
+                with self._lock:
+                    self._put_local(key, cached_k, results, ttl_left)
+                    self.store_hits += 1
+                return results[:max_results]
+        return None
+
+    def put(self, query: str, max_results: int, results: Results):
+        key = normalize_query(query)
+        with self._lock:
+            self._put_local(key, max_results, results, self.ttl_seconds)
+        if self.store is not None:
+            self.store.put(key, max_results, results, self.ttl_seconds)
+
+    def get_or_search(self, query: str, max_results: int, search: Callable[[str, int], Results]) -> Results:
+        key = normalize_query(query)
+        while True:
+            results = self.get(query, max_results)
+            if results is not None:
+                with self._lock:
+                    self.hits += 1
+                return results
+
+            with self._lock:
+                pending = self._in_flight.get(key)
+                if pending is None:
+                    self._in_flight[key] = threading.Event()
+                    self.misses += 1
+                    break
+            pending.wait(config.SEARCH_TIMEOUT_SECONDS)
+            if not pending.is_set():
+                with self._lock:
+                    self.misses += 1
+                return search(query, max_results)
+
+        try:
+            results = search(query, max_results)
+            self.put(query, max_results, results)
+            return results
+        finally:
+            with self._lock:
+                self._in_flight.pop(key).set()
+
+    async def aget_or_search(
+        self,
+        query: str,
+        max_results: int,
+        search: Callable[[str, int], Awaitable[Results]],
+    ) -> Results:
+        key = normalize_query(query)
+        while True:
+            if self.store is None:
+                results = self.get(query, max_results)
+            else:
+                results = await asyncio.to_thread(self.get, query, max_results)
+            if results is not None:
+                with self._lock:
+                    self.hits += 1
+                return results
+
+            pending = self._async_in_flight.get(key)
+            if pending is None:
+                self._async_in_flight[key] = asyncio.Event()
+                with self._lock:
+                    self.misses += 1
+                break
+            try:
+                await asyncio.wait_for(pending.wait(), config.SEARCH_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                with self._lock:
+                    self.misses += 1
+                return await search(query, max_results)
+
+        try:
+            results = await search(query, max_results)
+            if self.store is None:
+                self.put(query, max_results, results)
+            else:
+                await asyncio.to_thread(self.put, query, max_results, results)
+            return results
+        finally:
+            self._async_in_flight.pop(key).set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "store_hits": self.store_hits,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+search_cache = SearchCache(
+    store=DatabaseSearchStore() if config.SEARCH_CACHE_BACKEND == "db" else None,
+)
@@ -0,0 +1,128 @@
+import argparse
+import logging
+import re
+from typing import List, Set
+from sqlalchemy import delete, func, insert, literal, select, union_all
+from sqlalchemy.orm import Session
+from models.post_model import Post, PostTag, PostKeyword, AnalysisStatus
+import config
+
+logger = logging.getLogger("factline.similarity")
+
+def title_keywords(title: str) -> Set[str]:
+    return {word for word in re.findall(r"\w+", (title or "").lower()) if len(word) > 2}
+
+def index_keywords(db: Session, post_id: int, title: str):
+    db.execute(
+        delete(PostKeyword).where(PostKeyword.post_id == post_id),
+        execution_options={"synchronize_session": False},
+    )
+    keywords = [{"post_id": post_id, "keyword": keyword} for keyword in sorted(title_keywords(title))]
+    if keywords:
+        db.execute(insert(PostKeyword), keywords)
+
+def _source_terms(db: Session, source_posts: List[Post]):
+    source_ids = [post.id for post in source_posts]
+    tags = set(db.scalars(select(PostTag.tag).where(PostTag.post_id.in_(source_ids))).all())
+    keywords = set()
+    for post in source_posts:
+        keywords |= title_keywords(post.title)
+    return tags, keywords
+
+def find_similar_posts(
+    db: Session,
+    source_posts: List[Post],
+    limit: int = config.SIMILAR_POSTS_LIMIT,
+    max_candidates: int = config.SIMILAR_MAX_CANDIDATES,
+) -> List[int]:
+    if not source_posts:
+        return []
+
+    source_ids = {post.id for post in source_posts}
+    tags, keywords = _source_terms(db, source_posts)
+
+    branches = []
+    if tags:
+        branches.append(
+            select(PostTag.post_id.label("post_id"), PostTag.tag.label("term"), literal(2).label("weight"))
+            .where(PostTag.tag.in_(tags))
+            .distinct()
+        )
+    if keywords:
+        branches.append(
+            select(PostKeyword.post_id.label("post_id"), PostKeyword.keyword.label("term"), literal(1).label("weight"))
+            .where(PostKeyword.keyword.in_(keywords))
+        )
+
+    similar = []
+    if branches:
+        matches = union_all(*branches).subquery()
+        candidates = (
+            select(matches.c.post_id, matches.c.weight)
+            .join(Post, Post.id == matches.c.post_id)
+            .where(Post.analysis_status == AnalysisStatus.COMPLETED, Post.id.notin_(source_ids))
+            .order_by(matches.c.post_id.desc())
+            .limit(max_candidates)
+            .subquery()
+        )
+        score = func.sum(candidates.c.weight)
+        similar = db.execute(
+            select(candidates.c.post_id, score)
+            .group_by(candidates.c.post_id)
+            .order_by(score.desc(), candidates.c.post_id.desc())
+            .limit(limit)
+        ).all()
+
+    if not similar:
+        return list(db.scalars(
+            select(Post.id)
+            .where(Post.id.notin_(source_ids), Post.analysis_status == AnalysisStatus.COMPLETED)
+            .order_by(Post.created_at.desc())
+            .limit(limit)
+        ).all())
+
+    return [post_id for post_id, _ in similar]
+
+def backfill_keywords(db: Session, batch_size: int = 1000) -> int:
+    indexed = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(Post.id, Post.title)
+            .where(Post.id > last_id, ~select(PostKeyword.id).where(PostKeyword.post_id == Post.id).exists())
+            .order_by(Post.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return indexed
+        last_id = rows[-1][0]
+        keywords = [
+            {"post_id": post_id, "keyword": keyword}
+            for post_id, title in rows
+            for keyword in sorted(title_keywords(title))
+        ]
+        if keywords:
+            db.execute(insert(PostKeyword), keywords)
+        db.commit()
+        indexed += len(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Index title keywords of posts that are missing from post_keywords")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if config.DEBUG else logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        indexed = backfill_keywords(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+    logger.info("Indexed keywords for %d posts", indexed)
+
+if __name__ == "__main__":
+    main()
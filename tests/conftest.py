@@ -0,0 +1,17 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='factline-tests-')}/app.db"
+os.environ["PROVIDER_MODE"] = "synthetic"
+os.environ["SYNTHETIC_LATENCY_MS"] = "0"
+os.environ["EMBEDDED_ANALYSIS_WORKERS"] = "0"
+os.environ["DEDUP_ENABLED"] = "false"
+os.environ["CLAIM_CACHE_ENABLED"] = "false"
+os.environ["GEMINI_RATE_PER_SECOND"] = "0"
+os.environ["TAVILY_RATE_PER_SECOND"] = "0"
+os.environ.setdefault("GOOGLE_API_KEY", "offline")
+os.environ.setdefault("TAVILY_API_KEY", "offline")
+os.environ.setdefault("NEWS_API_KEY", "offline")
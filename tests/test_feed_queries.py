@@ -0,0 +1,139 @@
+import time
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+import agent
+import counters
+import main
+from auth_deps import get_current_user
+from database import get_db
+from db_base import Base
+from embeddings import EmbeddingIndex, embed_analysis
+from feed_snapshot import BreakingNewsSnapshot
+from models.post_model import Post
+from models.user import User
+from routes import post as post_routes
+
+EXPECTED_STATEMENTS = {
+    "/posts/breaking-news": 9,
+    "/posts/breaking-news?view=summary": 9,
+    "/posts/recommendations": 12,
+    "/posts/recommendations?view=summary": 7,
+    "/posts/?limit=3": 4,
+    "/posts/?limit=3&view=full": 9,
+    "/posts/?limit=3&cursor={cursor}": 4,
+    "/posts/?limit=3&tag=flood&min_credibility=52": 4,
+    "/posts/?limit=3&tag=weather&max_credibility=95&cursor={cursor}": 4,
+}
+
+def analysis(i: int, n_claims: int = 4) -> dict:
+    return {
+        "short_title": f"Storm update {i}",
+        "summary_easy": f"Heavy rain and flooding in region {i % 7}.",
+        "credibility_score": 50 + i % 50,
+        "tags": ["weather", f"region{i % 7}", "flood"],
+        "red_flags": [f"Red flag {j}" for j in range(3)],
+        "trust_signals": [f"Trust signal {j}" for j in range(3)],
+        "claims": [
+            {
+                "text": f"Claim {j} about storm {i}.",
+                "credibility_score": 60,
+                "confidence": "Medium",
+                "reason": "Reported by several outlets.",
+                "historical_context": "None.",
+                "sources": [f"https://example.com/{i}/{j}/{k}" for k in range(3)],
+                "fact_check_sites": [f"https://factcheck.example.org/{i}/{j}"],
+            }
+            for j in range(n_claims)
+        ],
+    }
+
+def seed(SessionLocal, n_posts: int) -> User:
+    db = SessionLocal()
+    try:
+        user = User(email=f"feed-{time.time_ns()}@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        for i in range(n_posts):
+            post = Post(title=f"Storm hits region {i % 7} with flooding {i}", body="Body", created_by=user.id)
+            db.add(post)
+            db.commit()
+            out = analysis(i)
+            agent.store_analysis(db, post.id, out, embedding=embed_analysis(out))
+            if i % 2:
+                counters.bump(db, post.id, views=1)
+                db.commit()
+        db.refresh(user)
+        db.expunge(user)
+        return user
+    finally:
+        db.close()
+
+@pytest.fixture(params=[8, 40], ids=lambda n: f"{n}-posts")
+def feed(request, tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/feed.db")
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    user = seed(SessionLocal, request.param)
+
+    def get_test_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    index = EmbeddingIndex(refresh_seconds=3600, prune_seconds=3600)
+    db = SessionLocal()
+    try:
+        index.refresh(db, force=True)
+    finally:
+        db.close()
+    monkeypatch.setattr(post_routes, "embedding_index", index)
+    monkeypatch.setattr(post_routes, "breaking_news_snapshot", BreakingNewsSnapshot(
+        refresh_seconds=3600, rebuild_delay=3600, session_factory=SessionLocal,
+    ))
+    monkeypatch.setitem(main.app.dependency_overrides, get_db, get_test_db)
+    monkeypatch.setitem(main.app.dependency_overrides, get_current_user, lambda: user)
+    yield TestClient(main.app), engine
+    engine.dispose()
+
+def count_statements(client, engine, path: str):
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        response = client.get(path)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["items"] if isinstance(body, dict) else body, f"{path} returned no posts"
+    return len(statements)
+
+@pytest.mark.parametrize("path", list(EXPECTED_STATEMENTS))
+def test_feed_statement_count(feed, path):
+    client, engine = feed
+    url = path
+    if "{cursor}" in path:
+        first_page = client.get(path.replace("&cursor={cursor}", "")).json()
+        assert first_page["next_cursor"]
+        url = path.format(cursor=first_page["next_cursor"])
+    statements = count_statements(client, engine, url)
+    assert statements == EXPECTED_STATEMENTS[path]
+
+def test_recommendations_statement_count_with_history(feed):
+    client, engine = feed
+    assert client.post("/posts/1/upvote").status_code == 201
+    statements = count_statements(client, engine, "/posts/recommendations")
+    assert statements == 13
+
+def test_breaking_news_served_from_snapshot(feed):
+    client, engine = feed
+    count_statements(client, engine, "/posts/breaking-news")
+    statements = count_statements(client, engine, "/posts/breaking-news")
+    assert statements == 1
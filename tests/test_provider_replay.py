@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+from agent import NewsArticle, NewsCredibilityEngine
+from agent_async import AsyncNewsCredibilityEngine
+from database import SessionLocal, dispose_async_engine, get_async_sessionmaker
+from models.post_model import Post
+from models.user import User
+from providers import provider_pool
+from search_cache import search_cache
+import provider_standins as standins
+
+ARTICLE = NewsArticle(
+    title="Council approves flood barrier funding",
+    body="The city council voted 7-2 on Tuesday to fund a new flood barrier along the river. " * 20,
+)
+
+def new_post() -> int:
+    db = SessionLocal()
+    try:
+        user = User(email=f"replay-{id(db)}@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        post = Post(title=ARTICLE.title, body=ARTICLE.body, created_by=user.id)
+        db.add(post)
+        db.commit()
+        return post.id
+    finally:
+        db.close()
+
+def run_sync(post_id: int):
+    db = SessionLocal()
+    try:
+        return NewsCredibilityEngine("offline", db, post_id).analyze(ARTICLE)
+    finally:
+        db.close()
+
+def run_async(post_id: int):
+    async def run():
+        try:
+            async with get_async_sessionmaker()() as db:
+                return await AsyncNewsCredibilityEngine("offline", db, post_id).analyze(ARTICLE)
+        finally:
+            await dispose_async_engine()
+    return asyncio.run(run())
+
+def use_clients(monkeypatch, gemini, tavily, async_tavily):
+    for name, client in (("gemini", gemini), ("async_gemini", gemini), ("tavily", tavily), ("async_tavily", async_tavily)):
+        monkeypatch.setattr(provider_pool, name, lambda client=client: client)
+
+@pytest.mark.parametrize("run", [run_sync, run_async], ids=["sync", "async"])
+def test_recorded_analysis_replays(run, tmp_path, monkeypatch):
+    path = str(tmp_path / "recordings.jsonl")
+    recordings = standins.Recordings(path)
+    use_clients(
+        monkeypatch,
+        standins.RecordingGemini(standins.SyntheticGemini(latency=0), recordings),
+        standins.RecordingTavily(standins.SyntheticTavily(latency=0), recordings),
+        standins.AsyncRecordingTavily(standins.AsyncSyntheticTavily(latency=0), recordings),
+    )
+    search_cache.clear()
+    recorded = run(new_post())
+    assert len(recordings) > 0
+
+    replayed_recordings = standins.Recordings(path)
+    use_clients(
+        monkeypatch,
+        standins.ReplayGemini(replayed_recordings),
+        standins.ReplayTavily(replayed_recordings),
+        standins.AsyncReplayTavily(replayed_recordings),
+    )
+    search_cache.clear()
+    replayed = run(new_post())
+    assert replayed == recorded
@@ -0,0 +1,57 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+import main
+from auth_deps import get_current_user
+from db_base import Base
+from models.post_model import Post, PostCounter, View
+from models.user import User
+from routes import post as post_routes
+from view_buffer import ViewBuffer
+
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/views.db")
+
+    @event.listens_for(engine, "connect")
+    def enforce_foreign_keys(conn, record):
+        conn.execute("PRAGMA foreign_keys=ON")
+
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def test_bad_view_rows_do_not_block_the_buffer(tmp_path):
+    SessionLocal = session_factory(tmp_path)
+    db = SessionLocal()
+    user = User(email="viewer@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    posts = [Post(title=f"Post {i}", body="Body", created_by=user.id) for i in range(3)]
+    db.add_all(posts)
+    db.commit()
+    post_ids = [post.id for post in posts]
+
+    buffer = ViewBuffer(max_size=100, flush_seconds=3600, dedup_window=0, session_factory=SessionLocal)
+    for post_id in post_ids:
+        buffer.record(user.id, post_id)
+    buffer.record(user.id + 1000, post_ids[0])
+    buffer.record(user.id, post_ids[1])
+
+    assert buffer.flush() == 4
+    stats = buffer.stats()
+    assert stats["pending"] == 0
+    assert stats["dropped"] == 1
+    assert stats["consecutive_failures"] == 0
+    assert db.scalar(select(func.count()).select_from(View)) == 4
+    assert dict(db.execute(select(PostCounter.post_id, PostCounter.views)).all()) == {
+        post_ids[0]: 1, post_ids[1]: 2, post_ids[2]: 1,
+    }
+    buffer.close()
+    db.close()
+
+def test_view_of_missing_post_is_rejected(tmp_path, monkeypatch):
+    buffer = ViewBuffer(flush_seconds=3600, session_factory=session_factory(tmp_path))
+    monkeypatch.setattr(post_routes, "view_buffer", buffer)
+    monkeypatch.setitem(main.app.dependency_overrides, get_current_user, lambda: User(id=1, email="viewer@example.com"))
+    response = TestClient(main.app).post("/posts/987654/view")
+    assert response.status_code == 404
+    assert buffer.stats()["recorded"] == 0
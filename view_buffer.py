@@ -0,0 +1,207 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import DataError, IntegrityError
+from models.post_model import Post, PostCounter, View
+import counters
+import config
+
+logger = logging.getLogger("factline.views")
+
+class ViewBuffer:
+    def __init__(
+        self,
+        max_size: int = config.VIEW_BUFFER_MAX_SIZE,
+        flush_seconds: float = config.VIEW_BUFFER_FLUSH_SECONDS,
+        dedup_window: float = config.VIEW_DEDUP_WINDOW_SECONDS,
+        max_pending: int = config.VIEW_BUFFER_MAX_PENDING,
+        max_backoff: float = config.VIEW_BUFFER_MAX_BACKOFF_SECONDS,
+        session_factory: Optional[Callable] = None,
+    ):
+        self.max_size = max_size
+        self.flush_seconds = flush_seconds
+        self.dedup_window = dedup_window
+        self.max_pending = max(max_pending, max_size)
+        self.max_backoff = max_backoff
+        self._session_factory = session_factory
+        self._pending: List[Dict[str, Any]] = []
+        self._recent: Dict[Tuple[int, int], float] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._flusher = None
+        self._retry_at = 0.0
+        self.consecutive_failures = 0
+        self.recorded = 0
+        self.deduped = 0
+        self.dropped = 0
+        self.written = 0
+        self.flushes = 0
+        self.failures = 0
+
+    def _session(self):
+        if self._session_factory is None:
+            from database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def record(self, user_id: int, post_id: int) -> bool:
+        now = time.monotonic()
+        key = (user_id, post_id)
+        with self._lock:
+            seen = self._recent.get(key)
+            if seen is not None and now - seen < self.dedup_window:
+                self.deduped += 1
+                return False
+            if self.dedup_window > 0:
+                self._recent[key] = now
+            self._pending.append({
+                "user_id": user_id,
+                "post_id": post_id,
+                "created_at": datetime.now(timezone.utc),
+            })
+            self.recorded += 1
+            self._trim()
+            full = len(self._pending) >= self.max_size and now >= self._retry_at
+        self._ensure_flusher()
+        if full:
+            self._wake.set()
+        return True
+
+    def _trim(self):
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            self.dropped += overflow
+
+    def _forget_expired(self):
+        cutoff = time.monotonic() - self.dedup_window
+        with self._lock:
+            self._recent = {key: seen for key, seen in self._recent.items() if seen > cutoff}
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return 0
+
+            db = self._session()
+            try:
+                try:
+                    written = self._write(db, rows)
+                except (IntegrityError, DataError):
+                    logger.warning("Flushing %d buffered views failed, retrying them one by one", len(rows), exc_info=True)
+                    db.rollback()
+                    written = self._write_each(db, rows)
+                db.commit()
+            except Exception:
+                logger.exception("Failed to flush %d buffered views", len(rows))
+                db.rollback()
+                with self._lock:
+                    self._pending[:0] = rows
+                    self._trim()
+                    self.failures += 1
+                    self.consecutive_failures += 1
+                    backoff = min(self.flush_seconds * 2 ** self.consecutive_failures, self.max_backoff)
+                    self._retry_at = time.monotonic() + backoff
+                return 0
+            finally:
+                db.close()
+
+            with self._lock:
+                self.written += written
+                self.dropped += len(rows) - written
+                self.flushes += 1
+                self.consecutive_failures = 0
+                self._retry_at = 0.0
+            return written
+
+    def _write(self, db, rows: List[Dict[str, Any]]) -> int:
+        post_ids = {row["post_id"] for row in rows}
+        existing = dict(db.execute(
+            select(Post.id, PostCounter.post_id)
+            .outerjoin(PostCounter, PostCounter.post_id == Post.id)
+            .where(Post.id.in_(post_ids))
+        ).all())
+        rows = [row for row in rows if row["post_id"] in existing]
+        if not rows:
+            return 0
+
+        db.execute(insert(View), rows)
+        by_increment: Dict[int, List[int]] = {}
+        for post_id, views in Counter(row["post_id"] for row in rows).items():
+            if existing[post_id] is None:
+                counters.bump(db, post_id, views=views)
+            else:
+                by_increment.setdefault(views, []).append(post_id)
+        for views, ids in by_increment.items():
+            db.execute(
+                update(PostCounter)
+                .where(PostCounter.post_id.in_(ids))
+                .values(views=PostCounter.views + views)
+                .execution_options(synchronize_session=False)
+            )
+        return len(rows)
+
+    def _write_each(self, db, rows: List[Dict[str, Any]]) -> int:
+        written = 0
+        for row in rows:
+            try:
+                with db.begin_nested():
+                    written += self._write(db, [row])
+            except (IntegrityError, DataError):
+                logger.warning("Dropping view of post %s by user %s", row["post_id"], row["user_id"], exc_info=True)
+        return written
+
+    def _ensure_flusher(self):
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._stopped.clear()
+            self._flusher = threading.Thread(target=self._flush_loop, name="view-flusher", daemon=True)
+            self._flusher.start()
+            atexit.register(self.close)
+
+    def _flush_loop(self):
+        while not self._stopped.is_set():
+            backoff = self._retry_at - time.monotonic()
+            self._wake.wait(backoff if backoff > 0 else self.flush_seconds)
+            self._wake.clear()
+            if time.monotonic() < self._retry_at and not self._stopped.is_set():
+                continue
+            self.flush()
+            self._forget_expired()
+
+    def close(self):
+        with self._lock:
+            flusher, self._flusher = self._flusher, None
+        self._stopped.set()
+        self._wake.set()
+        if flusher is not None:
+            flusher.join()
+            atexit.unregister(self.close)
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "recorded": self.recorded,
+                "deduped": self.deduped,
+                "dropped": self.dropped,
+                "written": self.written,
+                "flushes": self.flushes,
+                "failures": self.failures,
+                "consecutive_failures": self.consecutive_failures,
+            }
+
+view_buffer = ViewBuffer()
@@ -0,0 +1,312 @@
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from database import SessionLocal, get_async_sessionmaker, dispose_async_engine
+from models.job_model import AnalysisJob
+from models.post_model import Post
+import agent
+import agent_async
+import chunking
+import config
+import dedup
+import job_queue
+from progress import progress_registry, load_state
+from providers import provider_pool
+
+logger = logging.getLogger("factline.worker")
+
+def run_analysis_job(db: Session, job: AnalysisJob):
+    post = db.query(Post).filter(Post.id == job.post_id).first()
+    if not post:
+        return
+
+    engine = agent.NewsCredibilityEngine(
+        tavily_key=config.TAVILY_API_KEY,
+        db=db,
+        post_id=post.id
+    )
+
+    force = (job.payload or {}).get("force", False)
+    if config.DEDUP_ENABLED and not force:
+        match = dedup.find_duplicate(db, post)
+        if match:
+            source, similarity = match
+            engine.reuse_analysis(source, similarity)
+            return
+
+    news_article = agent.NewsArticle(title=post.title, body=post.body)
+    engine.analyze(news_article, lite=(job.payload or {}).get("lite"))
+
+async def run_analysis_job_async(job: AnalysisJob):
+    async with get_async_sessionmaker()() as db:
+        post = await db.get(Post, job.post_id)
+        if not post:
+            return
+
+        engine = agent_async.AsyncNewsCredibilityEngine(
+            tavily_key=config.TAVILY_API_KEY,
+            db=db,
+            post_id=post.id
+        )
+
+        force = (job.payload or {}).get("force", False)
+        if config.DEDUP_ENABLED and not force:
+            match = await db.run_sync(lambda session: dedup.find_duplicate(session, session.get(Post, post.id)))
+            if match:
+                source, similarity = match
+                await engine.reuse_analysis(source, similarity)
+                return
+
+        news_article = agent.NewsArticle(title=post.title, body=post.body)
+        await engine.analyze(news_article, lite=(job.payload or {}).get("lite"))
+
+def prepare_lite_batch(db: Session, job: AnalysisJob) -> Tuple[List[int], Dict[int, agent.NewsArticle]]:
+    payload = job.payload or {}
+    posts = db.query(Post).filter(Post.id.in_(payload.get("post_ids", []))).all()
+
+    articles = {}
+    for post in posts:
+        if not post.body.strip() or chunking.is_long_article(post.body):
+            continue
+        if config.DEDUP_ENABLED and not payload.get("force", False) and dedup.find_duplicate(db, post):
+            continue
+        articles[post.id] = agent.NewsArticle(title=post.title, body=post.body)
+    return [post.id for post in posts], articles
+
+def finish_lite_batch(db: Session, job: AnalysisJob, post_ids: List[int], lites: Dict[int, Dict]):
+    force = (job.payload or {}).get("force", False)
+    agent.store_lite_batch(db, lites)
+    if lites:
+        db.execute(
+            update(Post).where(Post.id.in_(list(lites))).values(status_message="Summary ready, analysis queued"),
+            execution_options={"synchronize_session": False},
+        )
+    for post_id in post_ids:
+        job_queue.enqueue(db, post_id, payload={"force": force, "lite": lites.get(post_id)}, commit=False)
+    db.commit()
+
+def run_lite_batch_job(db: Session, job: AnalysisJob):
+    post_ids, articles = prepare_lite_batch(db, job)
+    try:
+        lites = agent.batch_lite_transform(provider_pool.gemini(), articles)
+    except Exception:
+        logger.exception("Batched lite transform failed for job %s, falling back to per-post analysis", job.id)
+        lites = {}
+    finish_lite_batch(db, job, post_ids, lites)
+
+async def run_lite_batch_job_async(job: AnalysisJob):
+    async with get_async_sessionmaker()() as db:
+        post_ids, articles = await db.run_sync(prepare_lite_batch, job)
+        try:
+            lites = await agent_async.batch_lite_transform_async(provider_pool.async_gemini(), articles)
+        except Exception:
+            logger.exception("Batched lite transform failed for job %s, falling back to per-post analysis", job.id)
+            lites = {}
+        await db.run_sync(finish_lite_batch, job, post_ids, lites)
+
+JOB_HANDLERS = {
+    "analyze": run_analysis_job,
+    "lite_batch": run_lite_batch_job,
+}
+
+ASYNC_JOB_HANDLERS = {
+    "analyze": run_analysis_job_async,
+    "lite_batch": run_lite_batch_job_async,
+}
+
+class AnalysisWorker:
+    def __init__(
+        self,
+        concurrency: int = config.ANALYSIS_WORKER_CONCURRENCY,
+        poll_interval: float = config.JOB_POLL_INTERVAL_SECONDS,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name="analysis-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def run(self):
+        logger.info("Worker %s started with concurrency %d", self.worker_id, self.concurrency)
+        heartbeat_every = max(1.0, config.JOB_VISIBILITY_TIMEOUT_SECONDS / 3)
+        last_heartbeat = time.monotonic()
+        in_flight = {}
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="analysis") as pool:
+            while not self._stop.is_set():
+                for future in [f for f in in_flight if f.done()]:
+                    in_flight.pop(future)
+
+                if time.monotonic() - last_heartbeat >= heartbeat_every:
+                    self._heartbeat(in_flight.values())
+                    last_heartbeat = time.monotonic()
+
+                job_id = self._claim() if len(in_flight) < self.concurrency else None
+                if job_id is not None:
+                    in_flight[pool.submit(self._process, job_id)] = job_id
+                    continue
+
+                self._stop.wait(self.poll_interval)
+
+            logger.info("Worker %s draining %d in-flight jobs", self.worker_id, len(in_flight))
+
+    def _claim(self):
+        db = SessionLocal()
+        try:
+            job = job_queue.claim(db, self.worker_id)
+            return job.id if job else None
+        except Exception:
+            logger.exception("Failed to claim job")
+            db.rollback()
+            return None
+        finally:
+            db.close()
+
+    def _heartbeat(self, job_ids):
+        db = SessionLocal()
+        try:
+            job_queue.extend_lease(db, job_ids, self.worker_id)
+        except Exception:
+            logger.exception("Failed to extend job leases")
+            db.rollback()
+        finally:
+            db.close()
+
+    def _process(self, job_id: int):
+        db = SessionLocal()
+        try:
+            job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+            if not job:
+                return
+            handler = JOB_HANDLERS.get(job.kind)
+            try:
+                if handler is None:
+                    raise ValueError(f"Unknown job kind: {job.kind}")
+                handler(db, job)
+                if not job_queue.complete(db, job, self.worker_id):
+                    logger.warning("Lost the lease on job %s before it completed", job_id)
+            except Exception as e:
+                logger.exception("Job %s (%s) failed on attempt %s", job_id, job.kind, job.attempts)
+                db.rollback()
+                self._fail(job_id, str(e))
+        finally:
+            db.close()
+
+    def _load_job(self, job_id: int):
+        db = SessionLocal()
+        try:
+            job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+            if job:
+                db.expunge(job)
+            return job
+        finally:
+            db.close()
+
+    def _complete(self, job_id: int):
+        db = SessionLocal()
+        try:
+            job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+            if job and not job_queue.complete(db, job, self.worker_id):
+                logger.warning("Lost the lease on job %s before it completed", job_id)
+        finally:
+            db.close()
+
+    def _fail(self, job_id: int, error: str):
+        db = SessionLocal()
+        try:
+            job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+            if not job:
+                return
+            if job_queue.fail(db, job, error, self.worker_id) is None:
+                logger.warning("Lost the lease on job %s before recording its failure", job_id)
+                return
+            if job.post_id:
+                progress_registry.finish(job.post_id)
+            state = load_state(db, job.post_id) if job.post_id else None
+            if state:
+                progress_registry.publish(job.post_id, state)
+        finally:
+            db.close()
+
+class AsyncAnalysisWorker(AnalysisWorker):
+    def run(self):
+        asyncio.run(self.run_async())
+
+    async def run_async(self):
+        logger.info("Async worker %s started with concurrency %d", self.worker_id, self.concurrency)
+        heartbeat_every = max(1.0, config.JOB_VISIBILITY_TIMEOUT_SECONDS / 3)
+        last_heartbeat = time.monotonic()
+        in_flight = {}
+
+        while not self._stop.is_set():
+            if time.monotonic() - last_heartbeat >= heartbeat_every:
+                await asyncio.to_thread(self._heartbeat, list(in_flight.values()))
+                last_heartbeat = time.monotonic()
+
+            job_id = await asyncio.to_thread(self._claim) if len(in_flight) < self.concurrency else None
+            if job_id is not None:
+                task = asyncio.create_task(self._process_async(job_id))
+                in_flight[task] = job_id
+                task.add_done_callback(lambda t: in_flight.pop(t, None))
+                continue
+
+            await asyncio.sleep(self.poll_interval)
+
+        logger.info("Async worker %s draining %d in-flight jobs", self.worker_id, len(in_flight))
+        await asyncio.gather(*in_flight, return_exceptions=True)
+        await dispose_async_engine()
+
+    async def _process_async(self, job_id: int):
+        job = await asyncio.to_thread(self._load_job, job_id)
+        if not job:
+            return
+        handler = ASYNC_JOB_HANDLERS.get(job.kind)
+        try:
+            if handler is None:
+                raise ValueError(f"Unknown job kind: {job.kind}")
+            await handler(job)
+            await asyncio.to_thread(self._complete, job_id)
+        except Exception as e:
+            logger.exception("Job %s (%s) failed on attempt %s", job_id, job.kind, job.attempts)
+            await asyncio.to_thread(self._fail, job_id, str(e))
+
+def main():
+    parser = argparse.ArgumentParser(description="Factline analysis worker")
+    parser.add_argument("--concurrency", type=int, default=config.ANALYSIS_WORKER_CONCURRENCY)
+    parser.add_argument("--poll-interval", type=float, default=config.JOB_POLL_INTERVAL_SECONDS)
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="run analyses on one event loop with the async engine")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if config.DEBUG else logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+
+    worker_class = AsyncAnalysisWorker if args.use_async else AnalysisWorker
+    worker = worker_class(concurrency=args.concurrency, poll_interval=args.poll_interval)
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    signal.signal(signal.SIGINT, lambda *_: worker.stop())
+    worker.run()
+
+if __name__ == "__main__":
+    main()